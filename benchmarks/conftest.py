@@ -0,0 +1,39 @@
+import os
+import glob
+import random
+
+import pytest
+
+
+def make_corpus(n_lines, seed=0):
+    """
+    Build a reproducible synthetic corpus by resampling the words in data/*.txt
+    into lines of between 3 and 20 words.
+    """
+    words = []
+    data_dir = os.path.join(os.path.dirname(__file__), os.pardir, "data")
+    for filepath in sorted(glob.glob(os.path.join(data_dir, "*.txt"))):
+        with open(filepath, "r") as f:
+            words += f.read().split()
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(words) for _ in range(rng.randint(3, 20)))
+        for _ in range(n_lines)
+    ]
+
+
+@pytest.fixture(scope="session")
+def corpus():
+    return make_corpus(10000)
+
+
+@pytest.fixture(scope="session")
+def document():
+    """A few megabytes of text as a single string."""
+    return "\n".join(make_corpus(40000))
+
+
+@pytest.fixture(scope="session")
+def words(corpus):
+    """Single words, the shortest input is_maori usually sees."""
+    return [word for line in corpus[:1000] for word in line.split()]
@@ -0,0 +1,13 @@
+import pytest
+
+from reo_toolkit.concurrency import map_is_maori, map_encode
+
+
+@pytest.mark.parametrize("n_threads", [1, 2, 4])
+def test_map_is_maori(benchmark, corpus, n_threads):
+    benchmark(map_is_maori, corpus, n_threads=n_threads)
+
+
+@pytest.mark.parametrize("n_threads", [1, 2, 4])
+def test_map_encode(benchmark, corpus, n_threads):
+    benchmark(map_encode, corpus, "long_syllable", n_threads=n_threads)
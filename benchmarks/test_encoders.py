@@ -0,0 +1,59 @@
+from reo_toolkit.encoders import (
+    Base,
+    SingleVowel,
+    Diphthong,
+    DoubleVowel,
+    LongSyllable,
+    Syllable,
+)
+
+
+def test_single_vowel_encode(benchmark, document):
+    benchmark(SingleVowel().encode, document)
+
+
+def test_single_vowel_decode(benchmark, document):
+    benchmark(SingleVowel().decode, SingleVowel().encode(document))
+
+
+def test_diphthong_encode(benchmark, document):
+    benchmark(Diphthong().encode, document)
+
+
+def test_diphthong_decode(benchmark, document):
+    benchmark(Diphthong().decode, Diphthong().encode(document))
+
+
+def test_double_vowel_encode(benchmark, document):
+    benchmark(DoubleVowel().encode, document)
+
+
+def test_double_vowel_decode(benchmark, document):
+    benchmark(DoubleVowel().decode, DoubleVowel().encode(document))
+
+
+def test_long_syllable_encode(benchmark, document):
+    benchmark(LongSyllable().encode, document)
+
+
+def test_long_syllable_decode(benchmark, document):
+    benchmark(LongSyllable().decode, LongSyllable().encode(document))
+
+
+def test_syllable_encode(benchmark, corpus):
+    # Syllable tokenizes and checks every word, so a document is too slow to repeat
+    text = "\n".join(corpus[:1000])
+    benchmark(Syllable().encode, text)
+
+
+def test_syllable_decode(benchmark, corpus):
+    text = "\n".join(corpus[:1000])
+    benchmark(Syllable().decode, Syllable().encode(text))
+
+
+def test_base_encode(benchmark, document):
+    benchmark(Base().encode, document)
+
+
+def test_base_decode(benchmark, document):
+    benchmark(Base().decode, Base().encode(document))
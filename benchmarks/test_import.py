@@ -0,0 +1,20 @@
+import sys
+import subprocess
+
+
+def run(code):
+    subprocess.check_call([sys.executable, "-c", code])
+
+
+def test_interpreter_startup(benchmark):
+    # The baseline to subtract from the timings below
+    benchmark.pedantic(run, args=("pass",), rounds=10)
+
+
+def test_import(benchmark):
+    benchmark.pedantic(run, args=("import reo_toolkit",), rounds=10)
+
+
+def test_import_and_first_call(benchmark):
+    code = "import reo_toolkit; reo_toolkit.is_maori('kia ora', strict=False)"
+    benchmark.pedantic(run, args=(code,), rounds=10)
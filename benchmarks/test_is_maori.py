@@ -0,0 +1,47 @@
+import pytest
+
+from reo_toolkit import is_maori, is_maori_batch, maori_ratio, explain_maori
+from reo_toolkit.reo_toolkit import token_cache
+
+
+@pytest.mark.parametrize("strict", [True, False], ids=["strict", "non_strict"])
+def test_is_maori_short(benchmark, words, strict):
+    benchmark(lambda: [is_maori(word, strict=strict) for word in words])
+
+
+@pytest.mark.parametrize("strict", [True, False], ids=["strict", "non_strict"])
+def test_is_maori_short_uncached(benchmark, words, strict):
+    benchmark.pedantic(
+        lambda: [is_maori(word, strict=strict) for word in words],
+        setup=token_cache.clear,
+        rounds=20,
+    )
+
+
+@pytest.mark.parametrize("strict", [True, False], ids=["strict", "non_strict"])
+def test_is_maori_long(benchmark, document, strict):
+    benchmark(is_maori, document, strict=strict)
+
+
+def test_is_maori_per_line(benchmark, corpus):
+    benchmark(lambda: [is_maori(line) for line in corpus])
+
+
+def test_is_maori_batch(benchmark, corpus):
+    benchmark(is_maori_batch, corpus)
+
+
+def test_explain_maori(benchmark, corpus):
+    benchmark(lambda: [explain_maori(line) for line in corpus])
+
+
+def test_maori_ratio(benchmark, corpus):
+    benchmark(lambda: [maori_ratio(line) for line in corpus])
+
+
+def test_maori_ratio_long(benchmark, document):
+    benchmark(maori_ratio, document)
+
+
+def test_maori_ratio_long_threshold(benchmark, document):
+    benchmark(maori_ratio, document, threshold=0.5)
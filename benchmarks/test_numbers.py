@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from reo_toolkit.numbers import (
+    convert_numbers,
+    prepare_numbers,
+    digits_to_text,
+    digits_to_text_many,
+)
+
+
+@pytest.fixture(scope="module")
+def report():
+    """A number heavy document, like a financial report."""
+    rng = random.Random(0)
+    amounts = [
+        "${}".format(rng.randrange(1000000)),
+        "£{}".format(rng.randrange(1000000)),
+        "{}%".format(rng.randrange(100)),
+        "{}-{}".format(rng.randrange(2000), rng.randrange(2000)),
+        str(rng.randrange(1000000)),
+    ]
+    lines = []
+    for _ in range(2000):
+        words = ["te", "moni", "i", "whakapaua", rng.choice(amounts)]
+        for _ in range(rng.randint(1, 5)):
+            words.append(rng.choice(amounts))
+            words.append(rng.choice(["me", "ki", "mō", "i"]))
+        lines.append(" ".join(words))
+    return "\n".join(lines)
+
+
+def test_convert_numbers(benchmark, report):
+    benchmark(convert_numbers, report)
+
+
+def test_prepare_numbers(benchmark, report):
+    benchmark(prepare_numbers, report)
+
+
+def test_digits_to_text(benchmark):
+    benchmark(lambda: [digits_to_text(num) for num in range(0, 1000000, 97)])
+
+
+def test_digits_to_text_many(benchmark):
+    values = list(range(0, 1000000, 97))
+    benchmark(digits_to_text_many, values)
+
+
+def test_digits_to_text_many_array(benchmark):
+    np = pytest.importorskip("numpy")
+    values = np.arange(0, 1000000, 97)
+    benchmark(digits_to_text_many, values)
@@ -0,0 +1,31 @@
+import pytest
+
+from reo_toolkit.vocabulary import Vocabulary
+
+
+@pytest.fixture(scope="module")
+def vocabulary(corpus, tmp_path_factory):
+    filepath = str(tmp_path_factory.mktemp("vocabulary") / "corpus.vocab")
+    Vocabulary.build(corpus, encoders=["long_syllable"]).save(filepath)
+    vocabulary = Vocabulary.load(filepath)
+    yield vocabulary
+    vocabulary.close()
+
+
+def test_build(benchmark, corpus):
+    benchmark(Vocabulary.build, corpus)
+
+
+def test_is_maori(benchmark, vocabulary, corpus):
+    benchmark(lambda: [vocabulary.is_maori(line) for line in corpus])
+
+
+def test_is_maori_ids(benchmark, vocabulary, corpus):
+    # A corpus already stored as token IDs only needs the flags
+    ids = [vocabulary.ids(line) for line in corpus]
+    flags = vocabulary.flags
+    benchmark(lambda: [all(flags[i] & 1 for i in line) for line in ids])
+
+
+def test_encode(benchmark, vocabulary, corpus):
+    benchmark(lambda: [vocabulary.encode(line, "long_syllable") for line in corpus])
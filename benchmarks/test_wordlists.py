@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+from reo_toolkit import wordlists
+
+wordlist_dir = os.path.dirname(wordlists.__file__)
+
+
+@pytest.mark.parametrize("name", list(wordlists.wordlist_files))
+def test_make_wordlist(benchmark, name):
+    filepath = os.path.join(wordlist_dir, wordlists.wordlist_files[name])
+    benchmark(wordlists.make_wordlist, filepath)
+
+
+@pytest.mark.parametrize("name", list(wordlists.wordlist_files))
+def test_load_wordlist(benchmark, name):
+    filepath = os.path.join(wordlist_dir, wordlists.wordlist_files[name])
+    wordlists.load_wordlist(filepath)
+    benchmark(wordlists.load_wordlist, filepath)
+
+
+def test_make_scanner(benchmark):
+    benchmark(wordlists.make_scanner)
+
+
+def test_wordlist_density(benchmark, document):
+    benchmark(wordlists.wordlist_density, [document])
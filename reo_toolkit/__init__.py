@@ -1,4 +1,49 @@
-import re
+import importlib
 
-from .reo_toolkit import is_maori, ambiguous, vowels, consonants
-from . import encoders, numbers
+# Everything is imported on first use, so that `import reo_toolkit` stays fast
+# for code that only needs part of the package
+lazy_attributes = {
+    "is_maori": "reo_toolkit",
+    "is_maori_batch": "reo_toolkit",
+    "maori_ratio": "reo_toolkit",
+    "explain_maori": "reo_toolkit",
+    "ambiguous": "wordlists",
+    "vowels": "letters",
+    "consonants": "letters",
+}
+
+submodules = [
+    "reo_toolkit",
+    "encoders",
+    "numbers",
+    "wordlists",
+    "letters",
+    "utils",
+    "cache",
+    "phonotactics",
+    "filter",
+    "tokenizer",
+    "pipeline",
+    "vocabulary",
+    "corpus",
+    "concurrency",
+    "serve",
+]
+
+# What `from reo_toolkit import *` gives, loaded through __getattr__
+__all__ = list(lazy_attributes) + ["encoders", "numbers"]
+
+
+def __getattr__(name):
+    if name in submodules:
+        return importlib.import_module("." + name, __name__)
+    if name in lazy_attributes:
+        module = importlib.import_module("." + lazy_attributes[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(lazy_attributes) + submodules)
@@ -0,0 +1,324 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
+from functools import lru_cache
+
+from .utils import gil_enabled, map_split
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class TokenCache:
+    """
+    A bounded mapping from tokens to verdicts with hit/miss statistics.
+
+    Parameters:
+    maxsize (int): The most entries kept before evicting. None means unbounded
+        and 0 disables caching. Defaults to 65536.
+    policy (str): Which entry to evict when full, either "lru" (least recently
+        used) or "lfu" (least frequently used). Defaults to "lru".
+
+    One cache can be shared between threads. Entries are only changed while
+    holding a lock, except that with the GIL an lru lookup needs none, since the
+    dict lookup and move_to_end are each atomic. Those lookups count their hits
+    and misses without the lock too, so with many threads the statistics are
+    approximate and may fall a little short.
+
+    Examples:
+    >>> cache = TokenCache(maxsize=2)
+    >>> cache.put(("kia", True), True)
+    >>> cache.get(("kia", True))
+    True
+    >>> cache.info()
+    CacheInfo(hits=1, misses=0, maxsize=2, currsize=1)
+    """
+
+    def __init__(self, maxsize=65536, policy="lru"):
+        assert policy in ["lru", "lfu"], "Invalid policy! Choose one of 'lru' or 'lfu'"
+        self.maxsize = maxsize
+        self.policy = policy
+        self.lock = threading.Lock()
+        self.lock_free_get = policy == "lru" and gil_enabled()
+        self.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        if self.lock_free_get:
+            # Another thread may evict the key between the two steps
+            try:
+                value = self.data[key]
+                self.data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+        with self.lock:
+            try:
+                value = self.data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            if self.policy == "lru":
+                self.data.move_to_end(key)
+            else:
+                self._touch(key)
+            return value
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return
+        with self.lock:
+            if key in self.data:
+                self.data[key] = value
+                return
+            if self.maxsize is not None and len(self.data) >= self.maxsize:
+                self._evict()
+            self.data[key] = value
+            if self.policy == "lfu":
+                self.counts[key] = 1
+                self.buckets[1][key] = None
+                self.min_count = 1
+
+    def clear(self):
+        with self.lock:
+            self.data = OrderedDict()
+            # For lfu, keys are grouped in buckets by use count, oldest first
+            self.counts = {}
+            self.buckets = defaultdict(OrderedDict)
+            self.min_count = 0
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self.data))
+
+    def _touch(self, key):
+        count = self.counts[key]
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_count == count:
+                self.min_count = count + 1
+        self.counts[key] = count + 1
+        self.buckets[count + 1][key] = None
+
+    def _evict(self):
+        if self.policy == "lru":
+            self.data.popitem(last=False)
+            return
+        bucket = self.buckets[self.min_count]
+        key, _ = bucket.popitem(last=False)
+        if not bucket:
+            del self.buckets[self.min_count]
+        del self.counts[key]
+        del self.data[key]
+
+
+# Everything a verdict or an encoding depends on, relative to the package
+rules_files = [
+    "reo_toolkit.py",
+    "phonotactics.py",
+    "letters.py",
+    "utils.py",
+    "encoders.py",
+    "tokenizer.py",
+    "ambiguous_terms.txt",
+    "non_maori_terms.txt",
+    "stop_words.txt",
+    "double_vowel.json",
+    "long_syllable.json",
+]
+
+
+@lru_cache(maxsize=None)
+def rules_version(directory=None):
+    """
+    A hash of the code, wordlists and encoder maps that verdicts and encodings
+    depend on, so that a `PersistentCache` forgets them whenever any changes.
+    """
+    directory = directory or os.path.dirname(__file__)
+    digest = hashlib.sha1()
+    for filename in rules_files:
+        with open(os.path.join(directory, filename), "rb") as f:
+            digest.update(filename.encode("utf-8") + b"\0" + f.read())
+    return digest.hexdigest()[:16]
+
+
+class PersistentCache:
+    """
+    Verdicts and encodings of tokens kept in an SQLite file, so that they can be
+    shared between jobs and runs instead of being worked out again each time.
+
+    Entries are keyed by the token, the options (strict, or the encoder's name)
+    and `rules_version`, so changing the rules, the wordlists or the encoder
+    maps invalidates every entry made before. Entries for other versions are
+    deleted when the cache is opened. The file is in write-ahead logging mode,
+    so readers don't block each other or a writer, and writers wait up to
+    timeout seconds for each other. Open one PersistentCache per thread or
+    process.
+
+    Parameters:
+    filepath (str): The SQLite file, which is created if needed.
+    timeout (float): How many seconds to wait for another writer. Defaults to 30.
+    version (str): Overrides `rules_version`.
+
+    Examples:
+    >>> with PersistentCache("verdicts.sqlite") as cache:
+    ...     cache.is_maori_batch(["kia ora", "hello"])
+    [True, False]
+    """
+
+    # SQLite allows at most 999 parameters in a query in older versions
+    batch_size = 500
+
+    def __init__(self, filepath, timeout=30.0, version=None):
+        import sqlite3
+
+        self.filepath = filepath
+        self.version = version or rules_version()
+        self.connection = sqlite3.connect(filepath, timeout=timeout)
+        with self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "version TEXT, token TEXT, strict INTEGER, verdict INTEGER, "
+                "PRIMARY KEY (version, token, strict)) WITHOUT ROWID"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS encodings ("
+                "version TEXT, encoder TEXT, token TEXT, encoded TEXT, "
+                "PRIMARY KEY (version, encoder, token)) WITHOUT ROWID"
+            )
+            for table in ["verdicts", "encodings"]:
+                self.connection.execute(
+                    "DELETE FROM {} WHERE version != ?".format(table), (self.version,)
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _select(self, query, params, tokens):
+        """Run a query once per batch of tokens, collecting (token, value) rows."""
+        tokens = list(tokens)
+        found = {}
+        for i in range(0, len(tokens), self.batch_size):
+            batch = tokens[i : i + self.batch_size]
+            rows = self.connection.execute(
+                query.format(", ".join("?" * len(batch))), params + tuple(batch)
+            )
+            found.update(rows)
+        return found
+
+    def get_verdicts(self, tokens, strict=True):
+        """Look up many tokens at once, returning a dict of the verdicts found."""
+        found = self._select(
+            "SELECT token, verdict FROM verdicts "
+            "WHERE version = ? AND strict = ? AND token IN ({})",
+            (self.version, int(strict)),
+            tokens,
+        )
+        return {token: bool(verdict) for token, verdict in found.items()}
+
+    def put_verdicts(self, verdicts, strict=True):
+        """Store a dict of verdicts for tokens in one transaction."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?)",
+                (
+                    (self.version, token, int(strict), int(verdict))
+                    for token, verdict in verdicts.items()
+                ),
+            )
+
+    def get_encodings(self, tokens, encoder):
+        """Look up many tokens at once, returning a dict of the encodings found."""
+        return self._select(
+            "SELECT token, encoded FROM encodings "
+            "WHERE version = ? AND encoder = ? AND token IN ({})",
+            (self.version, encoder),
+            tokens,
+        )
+
+    def put_encodings(self, encodings, encoder):
+        """Store a dict of encodings of tokens in one transaction."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO encodings VALUES (?, ?, ?, ?)",
+                (
+                    (self.version, encoder, token, encoded)
+                    for token, encoded in encodings.items()
+                ),
+            )
+
+    def is_maori_batch(self, texts, strict=True, n_jobs=1, chunksize=10000):
+        """
+        Gives the same verdicts as `is_maori_batch`, looking each distinct token up
+        in the cache first and only classifying, and storing, the ones not there.
+        """
+        from .reo_toolkit import splitter, is_maori_batch
+
+        splits = [splitter.split(text.strip()) for text in texts]
+        tokens = {token for pieces in splits for token in pieces if token}
+        verdicts = self.get_verdicts(tokens, strict=strict)
+        missing = [token for token in tokens if token not in verdicts]
+        if missing:
+            # A token has no whitespace or hyphens, so it is a text of its own
+            new = dict(
+                zip(
+                    missing,
+                    is_maori_batch(
+                        missing, strict=strict, n_jobs=n_jobs, chunksize=chunksize
+                    ),
+                )
+            )
+            self.put_verdicts(new, strict=strict)
+            verdicts.update(new)
+        # An empty piece only passes when it is the whole text
+        return [
+            all(verdicts[token] if token else len(pieces) == 1 for token in pieces)
+            for pieces in splits
+        ]
+
+    def encode_batch(self, texts, encoder="base"):
+        """
+        Encode many texts with the named encoder, looking each distinct token up in
+        the cache first and only encoding, and storing, the ones not there.
+        Like `Vocabulary.encode`, texts are split up at the encoder's separators,
+        so the result is the same as encoding each whole text. Encoders that
+        don't give their separators encode each whole text without the cache.
+        """
+        from .encoders import get_encoder
+
+        instance = get_encoder(encoder)
+        encode = instance.encode
+        pattern = getattr(instance, "separators", None)
+        if pattern is None:
+            return list(map(encode, texts))
+
+        # split puts the separators at the odd indices
+        tokens = {
+            token for text in texts for token in pattern.split(text)[::2] if token
+        }
+        encodings = self.get_encodings(tokens, encoder)
+        missing = [token for token in tokens if token not in encodings]
+        if missing:
+            new = {token: encode(token) for token in missing}
+            self.put_encodings(new, encoder)
+            encodings.update(new)
+        return [map_split(pattern, text, encodings.__getitem__) for text in texts]
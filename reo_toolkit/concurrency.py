@@ -0,0 +1,99 @@
+"""
+Classify and encode many texts at once across a pool of threads.
+
+Everything these helpers call is safe to share between threads: encoders and
+their tables never change once they are built, `get_encoder` and the wordlists
+are built under a lock the first time they are used, the wordlist automata are
+only ever read, and `token_cache` holds a lock while it is updated. Nothing
+logs or changes global state on the way.
+
+On a standard CPython build the GIL lets only one thread run Python code at a
+time, so threads mostly help when they share the work with I/O. On a
+free-threaded build (3.13t and later) they run in parallel and throughput
+grows with the number of threads. Use `is_maori_batch(n_jobs=...)` or the
+pipeline for process based parallelism instead.
+
+    with ThreadPoolExecutor(8) as executor:
+        verdicts = map_is_maori(lines, executor=executor)
+        encoded = map_encode(lines, "long_syllable", executor=executor)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .reo_toolkit import is_maori, _chunked
+from .encoders import get_encoder
+
+
+def _apply(func, chunk):
+    return [func(item) for item in chunk]
+
+
+def thread_map(func, items, n_threads=-1, chunksize=1000, executor=None):
+    """
+    Apply func to every item across a pool of threads, keeping the input order.
+
+    Items are handed to the threads chunksize at a time, which keeps the cost of
+    scheduling them small next to the work done on each chunk.
+
+    Parameters:
+    func (callable): The function to apply, which must be safe to call from
+        many threads at once.
+    items (iterable): The items to apply it to.
+    n_threads (int): Number of threads, or -1 for one per core. Ignored when
+        an executor is given. Defaults to -1.
+    chunksize (int): Number of items sent to a thread at a time.
+    executor (Executor): An existing executor to use instead of starting a new
+        pool of threads for this call.
+
+    Returns:
+    list: func(item) for each item, in input order.
+
+    Examples:
+    >>> thread_map(len, ["kia", "ora"], n_threads=2)
+    [3, 3]
+    """
+    assert chunksize > 0, "chunksize must be positive"
+    if executor is None:
+        n_threads = os.cpu_count() if n_threads < 0 else n_threads
+        with ThreadPoolExecutor(n_threads) as executor:
+            return thread_map(func, items, chunksize=chunksize, executor=executor)
+
+    chunks = executor.map(partial(_apply, func), _chunked(items, chunksize))
+    return [result for chunk in chunks for result in chunk]
+
+
+def map_is_maori(texts, strict=True, **kwargs):
+    """
+    Apply `is_maori` to many texts across a pool of threads.
+
+    Keyword arguments are passed on to `thread_map`.
+
+    Examples:
+    >>> map_is_maori(["kia ora", "hello"], n_threads=2)
+    [True, False]
+    """
+    return thread_map(partial(is_maori, strict=strict), texts, **kwargs)
+
+
+def map_encode(texts, encoder="base", **kwargs):
+    """
+    Encode many texts with the named encoder across a pool of threads.
+
+    Keyword arguments are passed on to `thread_map`.
+
+    Examples:
+    >>> map_encode(["whānau", "ngā"], n_threads=2)
+    ['ƒānau', 'ŋā']
+    """
+    return thread_map(get_encoder(encoder).encode, texts, **kwargs)
+
+
+def map_decode(texts, encoder="base", **kwargs):
+    """
+    Decode many texts with the named encoder across a pool of threads.
+
+    Keyword arguments are passed on to `thread_map`.
+    """
+    return thread_map(get_encoder(encoder).decode, texts, **kwargs)
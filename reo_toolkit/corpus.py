@@ -0,0 +1,138 @@
+"""
+Read large text files through a memory map, a line at a time.
+
+A `MappedCorpus` finds the byte span of each line in the mapped file without
+copying it, and only decodes a line to a string when it is asked for. A file can
+be partitioned into byte ranges that start at the beginning of a line, so that
+worker processes can each map the same file and read their own part of it
+instead of having lines read and pickled to them by one process. A newline byte
+never occurs inside a multi-byte UTF-8 character, so line boundaries are always
+safe places to split. Lines may end with CRLF as well as LF, and as when reading
+in text mode the CR is left out.
+
+    with MappedCorpus("corpus.txt") as corpus:
+        ranges = corpus.partition(8)
+
+    # then in each worker
+    with MappedCorpus("corpus.txt", *ranges[i]) as corpus:
+        for line in corpus:
+            ...
+"""
+
+import os
+import mmap
+
+
+class MappedCorpus:
+    """
+    A memory mapped UTF-8 text file, or the part of one from byte start to end.
+
+    Parameters:
+    filepath (str): The file to map.
+    start (int): Where to start reading, which should be the start of a line.
+        Defaults to 0.
+    end (int): Where to stop reading, which should be the start of a line or
+        the end of the file. Defaults to the end of the file.
+    blocksize (int): Roughly how many bytes to decode at a time when iterating
+        over lines. Defaults to 1MB.
+    """
+
+    def __init__(self, filepath, start=0, end=None, blocksize=1 << 20):
+        self.filepath = filepath
+        self.blocksize = blocksize
+        size = os.path.getsize(filepath)
+        self.start = start
+        self.end = size if end is None else min(end, size)
+        if size:
+            with open(filepath, "rb") as f:
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self.mapped)
+        else:
+            # An empty file can't be mapped
+            self.mapped = None
+            self.view = memoryview(b"")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.view.release()
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+    def spans(self):
+        """Yield the (start, end) byte offsets of each line, without its newline."""
+        if self.mapped is None:
+            return
+        mapped = self.mapped
+        find = mapped.find
+        position = self.start
+        end = self.end
+        while position < end:
+            newline = find(b"\n", position, end)
+            stop = end if newline < 0 else newline
+            if stop > position and mapped[stop - 1] == 13:
+                # Leave out the \r of \r\n
+                stop -= 1
+            yield position, stop
+            if newline < 0:
+                return
+            position = newline + 1
+
+    def line(self, span):
+        """Decode the line at a span."""
+        start, end = span
+        return str(self.view[start:end], "utf-8")
+
+    def __iter__(self):
+        """Yield each line as a string, without its newline."""
+        if self.mapped is None:
+            return
+        # Decoding a block of whole lines at a time is quicker than decoding
+        # every line on its own
+        find = self.mapped.find
+        position = self.start
+        end = self.end
+        while position < end:
+            stop = end
+            if position + self.blocksize < end:
+                newline = find(b"\n", position + self.blocksize - 1, end)
+                if newline >= 0:
+                    stop = newline + 1
+            block = str(self.view[position:stop], "utf-8")
+            if "\r" in block:
+                # A block never ends between the \r and \n of \r\n
+                block = block.replace("\r\n", "\n")
+                if block.endswith("\r"):
+                    block = block[:-1]
+            lines = block.split("\n")
+            # Every block ends with a newline, except perhaps the last
+            if lines[-1] == "":
+                lines.pop()
+            yield from lines
+            position = stop
+
+    def partition(self, n_parts):
+        """
+        Split the corpus into up to n_parts (start, end) byte ranges of about the
+        same size, each starting at the beginning of a line.
+        """
+        if self.mapped is None:
+            return []
+        offsets = [self.start]
+        size = self.end - self.start
+        for i in range(1, n_parts):
+            target = self.start + i * size // n_parts
+            # The first line that starts at or after the target
+            newline = self.mapped.find(b"\n", max(target - 1, offsets[-1]), self.end)
+            if newline < 0:
+                break
+            if newline + 1 > offsets[-1]:
+                offsets.append(newline + 1)
+        if offsets[-1] < self.end:
+            offsets.append(self.end)
+        return list(zip(offsets, offsets[1:]))
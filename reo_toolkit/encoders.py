@@ -1,43 +1,217 @@
 import re
-import sys
-import nltk
-import jamo
 import json
 import logging
 import pkgutil
+import threading
+from types import MappingProxyType
+from functools import lru_cache, partial
 from collections import OrderedDict
-from nltk.tokenize import TreebankWordTokenizer
-from nltk.tokenize.treebank import TreebankWordDetokenizer
 
 from .letters import vowels, consonants, alphabet
-
-
-def get_encoder(name):
-    available_encoders = [
-        "base",
-        "single_vowel",
-        "diphthong",
-        "syllable",
-        "double_vowel",
-        "long_syllable",
-    ]
-    assert (
-        name in available_encoders
-    ), "Invalid encoder! Choose one of '{}', '{}', '{}', '{}', '{}' or '{}'".format(
-        *available_encoders
+from .tokenizer import word as word_regex, detokenize, map_words
+from .utils import read_blocks, map_split
+
+# Shared encoder instances, built the first time each one is asked for
+encoders = {}
+encoders_lock = threading.Lock()
+
+
+def get_encoder(name, **kwargs):
+    """
+    Get the encoder registered under name, e.g. "long_syllable".
+
+    Each encoder is built once per process, passing any keyword arguments on to
+    its constructor, and the same instance is handed out every time after that.
+    Encoders don't change once they are built, so it is safe to share them,
+    including between threads.
+    """
+    key = (name, tuple(sorted(kwargs.items()))) if kwargs else name
+    try:
+        return encoders[key]
+    except KeyError:
+        pass
+
+    available_encoders = list(encoder_classes)
+    assert name in encoder_classes, "Invalid encoder! Choose one of {} or '{}'".format(
+        ", ".join("'{}'".format(name) for name in available_encoders[:-1]),
+        available_encoders[-1],
+    )
+    with encoders_lock:
+        if key not in encoders:
+            encoders[key] = encoder_classes[name](**kwargs)
+        return encoders[key]
+
+
+def register_encoder(name, encoder_class):
+    """
+    Make a new kind of encoder available from `get_encoder`.
+
+    Subclass `Encoder` to get the streaming methods, and set separators to a
+    regex with one group if the encoder never matches across it, which lets
+    `Vocabulary.encode` and `PersistentCache.encode_batch` encode a text a
+    piece at a time.
+    """
+    with encoders_lock:
+        encoder_classes[name] = encoder_class
+        for key in list(encoders):
+            if key == name or (isinstance(key, tuple) and key[0] == name):
+                del encoders[key]
+
+
+def map_lines(func, lines):
+    """
+    Apply an encoder's encode or decode to many lines in one call. Encoders never
+    match across a newline, so the lines, which mustn't contain newlines
+    themselves, are joined into one text and split apart again afterwards.
+
+    Examples:
+    >>> map_lines(get_encoder("base").encode, ["whānau", "ngā"])
+    ['ƒānau', 'ŋā']
+    """
+    if not lines:
+        return []
+    return func("\n".join(lines)).split("\n")
+
+
+def replace_all(text, replacements):
+    """
+    Apply a sequence of (key, value) replacements one after another.
+
+    Chained str.replace calls each make a fast pass over the text in C, which
+    beats a single pass that calls back into Python for every match. Checking
+    for the key first is quicker still when it doesn't occur, which is usual.
+    """
+    for key, value in replacements:
+        if key in text:
+            text = text.replace(key, value)
+    return text
+
+
+def trie_pattern(keys):
+    """
+    Compile keys into a regex with one capturing group that matches the longest
+    key starting at a position, by nesting the alternatives as a trie, e.g.
+    ["a", "ae", "ai"] becomes "(a(?:e|i)?)".
+    """
+    trie = {}
+    for key in keys:
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def to_regex(node):
+        branches = [
+            re.escape(ch) + to_regex(child) for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ""
+        regex = (
+            branches[0] if len(branches) == 1 else "(?:{})".format("|".join(branches))
+        )
+        if "" in node:
+            # Greedy, so the longer keys are tried first
+            regex = "(?:{})?".format(regex)
+        return regex
+
+    return re.compile("({})".format(to_regex(trie)))
+
+
+class LongestMatch:
+    """
+    Replace the keys of a mapping in a single pass over the text, taking the
+    longest key at each position from left to right.
+
+    Single character keys are replaced afterwards with str.translate, which is
+    quicker than matching them with the regex, unless a longer key's replacement
+    could be mistaken for one of them.
+    """
+
+    def __init__(self, mapping):
+        longer = {k: v for k, v in mapping.items() if len(k) > 1}
+        single = {k: v for k, v in mapping.items() if len(k) == 1}
+        if any(ch in single and single[ch] != ch for v in longer.values() for ch in v):
+            longer, single = dict(mapping), {}
+        self.mapping = longer
+        self.pattern = trie_pattern(longer) if longer else None
+        self.table = {ord(k): v for k, v in single.items()}
+
+    def replace(self, text):
+        if self.pattern is not None:
+            text = map_split(self.pattern, text, self.mapping.__getitem__, True)
+        return text.translate(self.table)
+
+
+class Encoder:
+    """
+    Streaming versions of encode and decode, shared by every encoder.
+
+    Text is read a block of about blocksize characters at a time, with each block
+    ending on whitespace. No encoder matches across whitespace, so digraphs and
+    syllables are never split between blocks and the output is the same as
+    encoding or decoding all of the text at once. The one exception is
+    treebank=True, where nltk may also move spaces next to punctuation.
+
+    Encoders keep their tables in read-only mappings and never change after they
+    are built, so one instance can be used from any number of threads at once.
+
+    Examples:
+    >>> with open("corpus.txt") as f, open("encoded.txt", "w") as out:
+    ...     out.writelines(get_encoder("long_syllable").encode_stream(f))
+    """
+
+    # Nothing is matched across these, so encoding the pieces of text between
+    # them one at a time gives the same result as encoding the whole text
+    separators = re.compile(r"([\s\-]+)")
+
+    def encode_stream(self, stream, blocksize=1 << 20):
+        """Encode a file object or iterable of strings, yielding the encoded text."""
+        for block in read_blocks(stream, blocksize):
+            yield self.encode(block)
+
+    def decode_stream(self, stream, blocksize=1 << 20):
+        """Decode a file object or iterable of strings, yielding the decoded text."""
+        for block in read_blocks(stream, blocksize):
+            yield self.decode(block)
+
+
+class Base(Encoder):
+    """
+    Encode the digraphs ng and wh as single characters.
+
+    Parameters:
+    treebank (bool): Tokenize with nltk's Treebank tokenizer and detokenizer when
+        decoding, as older versions did, instead of the built-in tokenizer.
+        Defaults to False.
+    """
+
+    encoder_dict = MappingProxyType({"N[Gg]": "Ŋ", "W[Hh]": "Ƒ", "ng": "ŋ", "wh": "ƒ"})
+
+    decoder_dict = MappingProxyType({"Ŋ": "Ng", "Ƒ": "Wh", "ŋ": "ng", "ƒ": "wh"})
+
+    # Compiled once, rather than on every call to encode. Each pass is a plain
+    # substitution in C, which beats one pass over their union that calls back
+    # into Python for every match
+    encoder_patterns = tuple(
+        (re.compile(pattern), replacement)
+        for pattern, replacement in encoder_dict.items()
     )
 
-    encoder = "".join(map(str.title, name.split("_")))
-    return getattr(sys.modules[__name__], encoder)()
+    decoder_replacements = tuple(decoder_dict.items())
 
+    # Words with a capitalised digraph in them, which may need restore_caps
+    caps_pattern = re.compile(r"(?=[\w\u0304'’-]*?(?:Ng|Wh))" + word_regex)
 
-class Base:
+    def __init__(self, treebank=False):
+        self.treebank = treebank
 
-    encoder_dict = {"N[Gg]": "Ŋ", "W[Hh]": "Ƒ", "ng": "ŋ", "wh": "ƒ"}
+    def detokenize(self, words):
+        if not self.treebank:
+            return detokenize(words)
 
-    decoder_dict = {"Ŋ": "Ng", "Ƒ": "Wh", "ŋ": "ng", "ƒ": "wh"}
+        # nltk is slow to import, so only load it once it is needed
+        from nltk.tokenize.treebank import TreebankWordDetokenizer
 
-    def detokenize(self, words):
         detokenized = TreebankWordDetokenizer().detokenize(words)
         for punct in [",", "\\.", "\\?", "!", ":", ";"]:
             detokenized = re.sub("[ ]+" + punct, punct.replace("\\", ""), detokenized)
@@ -45,14 +219,29 @@ class Base:
         detokenized = re.sub(" ’", "’", detokenized)
         return detokenized
 
+    def restore_caps(self, word):
+        # Ŋ and Ƒ decode to Ng and Wh, which should be NG and WH in a word in capitals
+        rest = word.replace("Ng", "").replace("Wh", "")
+        if rest.upper() == rest:
+            word = word.replace("Ng", "NG").replace("Wh", "WH")
+        return word
+
     def encode(self, text):
-        for k, v in self.encoder_dict.items():
-            text = re.sub(k, v, text)
+        for pattern, replacement in self.encoder_patterns:
+            text = pattern.sub(replacement, text)
         return text
 
     def decode(self, text):
-        for k, v in self.decoder_dict.items():
-            text = re.sub(k, v, text)
+        text = replace_all(text, self.decoder_replacements)
+        if not self.treebank:
+            if "Ng" in text or "Wh" in text:
+                text = self.caps_pattern.sub(
+                    lambda m: self.restore_caps(m.group()), text
+                )
+            return text
+
+        from nltk.tokenize import TreebankWordTokenizer
+
         words = []
         for word in TreebankWordTokenizer().tokenize(text):
             if "Ng" in word:
@@ -67,119 +256,123 @@ class Base:
         return self.detokenize(words)
 
 
-class SingleVowel:
-
-    encoder_dict = {
-        "ā": "aa",
-        "ē": "ee",
-        "ī": "ii",
-        "ō": "oo",
-        "ū": "uu",
-        "ng": "ŋ",
-        "wh": "ƒ",
-        "Ā": "Aa",
-        "Ē": "Ee",
-        "Ī": "Ii",
-        "Ō": "Oo",
-        "Ū": "Uu",
-        "NG": "Ŋ",
-        "WH": "Ƒ",
-    }
+class SingleVowel(Encoder):
+
+    encoder_dict = MappingProxyType(
+        {
+            "ā": "aa",
+            "ē": "ee",
+            "ī": "ii",
+            "ō": "oo",
+            "ū": "uu",
+            "ng": "ŋ",
+            "wh": "ƒ",
+            "Ā": "Aa",
+            "Ē": "Ee",
+            "Ī": "Ii",
+            "Ō": "Oo",
+            "Ū": "Uu",
+            "NG": "Ŋ",
+            "WH": "Ƒ",
+        }
+    )
 
-    decoder_dict = {v: k for k, v in encoder_dict.items()}
+    decoder_dict = MappingProxyType({v: k for k, v in encoder_dict.items()})
 
-    def encode(self, text):
-        for k, v in self.encoder_dict.items():
-            text = text.replace(k, v)
-        return text
+    encoder_replacements = tuple(encoder_dict.items())
 
-    def decode(self, text):
+    decoder_replacements = tuple(decoder_dict.items())
 
-        for k, v in self.decoder_dict.items():
-            if k in text:
-                text = text.replace(k, v)
+    def encode(self, text):
+        return replace_all(text, self.encoder_replacements)
 
-        return text
+    def decode(self, text):
+        return replace_all(text, self.decoder_replacements)
+
+
+class Diphthong(Encoder):
+
+    encoder_dict = MappingProxyType(
+        {
+            "ae": "æ",
+            "ai": "á",
+            "ao": "å",
+            "au": "ä",
+            "ei": "é",
+            "oe": "œ",
+            "oi": "ó",
+            "ou": "ö",
+            "ng": "ŋ",
+            "wh": "ƒ",
+            "AE": "Æ",
+            "AI": "Á",
+            "AO": "Å",
+            "AU": "Ä",
+            "EI": "É",
+            "OE": "Œ",
+            "OI": "Ó",
+            "OU": "Ö",
+            "NG": "Ŋ",
+            "WH": "Ƒ",
+        }
+    )
 
+    decoder_dict = MappingProxyType({v: k for k, v in encoder_dict.items()})
 
-class Diphthong:
-
-    encoder_dict = {
-        "ae": "æ",
-        "ai": "á",
-        "ao": "å",
-        "au": "ä",
-        "ei": "é",
-        "oe": "œ",
-        "oi": "ó",
-        "ou": "ö",
-        "ng": "ŋ",
-        "wh": "ƒ",
-        "AE": "Æ",
-        "AI": "Á",
-        "AO": "Å",
-        "AU": "Ä",
-        "EI": "É",
-        "OE": "Œ",
-        "OI": "Ó",
-        "OU": "Ö",
-        "NG": "Ŋ",
-        "WH": "Ƒ",
-    }
+    encoder_replacements = tuple(encoder_dict.items())
 
-    decoder_dict = {v: k for k, v in encoder_dict.items()}
+    decoder_replacements = tuple(decoder_dict.items())
 
     def encode(self, text):
-        for k, v in self.encoder_dict.items():
-            text = text.replace(k, v)
-        return text
+        return replace_all(text, self.encoder_replacements)
 
     def decode(self, text):
+        return replace_all(text, self.decoder_replacements)
+
+
+class Syllable(Encoder):
+
+    encoder_dict = MappingProxyType(
+        {
+            "a": "ᅡ",
+            "ā": "ᅣ",
+            "ē": "ᅨ",
+            "e": "ᅦ",
+            "i": "ᅥ",
+            "ī": "ᅧ",
+            "o": "ᅩ",
+            "ō": "ᅭ",
+            "u": "ᅮ",
+            "ū": "ᅲ",
+            "h": "ᄒ",
+            "k": "ᄏ",
+            "m": "ᄆ",
+            "n": "ᄂ",
+            "p": "ᄑ",
+            "r": "ᄅ",
+            "t": "ᄐ",
+            "w": "ᄇ",
+            "ŋ": "ᄉ",
+            "ƒ": "ᄌ",
+            "ᄋ": "ᄋ",
+        }
+    )
 
-        for k, v in self.decoder_dict.items():
-            if k in text:
-                text = text.replace(k, v)
-
-        return text
-
-
-class Syllable:
-
-    encoder_dict = {
-        "a": "ᅡ",
-        "ā": "ᅣ",
-        "ē": "ᅨ",
-        "e": "ᅦ",
-        "i": "ᅥ",
-        "ī": "ᅧ",
-        "o": "ᅩ",
-        "ō": "ᅭ",
-        "u": "ᅮ",
-        "ū": "ᅲ",
-        "h": "ᄒ",
-        "k": "ᄏ",
-        "m": "ᄆ",
-        "n": "ᄂ",
-        "p": "ᄑ",
-        "r": "ᄅ",
-        "t": "ᄐ",
-        "w": "ᄇ",
-        "ŋ": "ᄉ",
-        "ƒ": "ᄌ",
-        "ᄋ": "ᄋ",
-    }
+    decoder_dict = MappingProxyType({v: k for k, v in encoder_dict.items()})
 
-    decoder_dict = {v: k for k, v in encoder_dict.items()}
+    # Hyphenated words are checked with is_maori as a whole
+    separators = re.compile(r"(\s+)")
 
-    def __init__(self, vowel_type="long"):
+    def __init__(self, vowel_type="long", treebank=False):
         self.vowel_type = vowel_type
+        self.treebank = treebank
 
     def preprocess(self, text, vowel_type):
         # Syllable encoder only supports lowercase text
         text = text.lower()
         if vowel_type == "short":
-            text = SingleVowel().encode(text)
-        return Base().encode(text)
+            text = get_encoder("single_vowel").encode(text)
+        return get_encoder("base").encode(text)
 
     def tokenize(self, text):
         for i, ch in enumerate(text):
@@ -195,112 +388,145 @@ class Syllable:
                 yield text[i : i + 2]
 
     def detokenize(self, words):
-        detokenized = " ".join(words)
-        for punct in [",", "\\.", "\\?", "!", ":", ";"]:
-            detokenized = re.sub("[ ]+" + punct, punct.replace("\\", ""), detokenized)
-        detokenized = re.sub("‘ ", "‘", detokenized)
-        detokenized = re.sub(" ’", "’", detokenized)
-        return detokenized
+        return detokenize(words)
 
     def encode(self, text):
+        # Imported here rather than for every word, as reo_toolkit imports this module
+        from .reo_toolkit import is_maori
+
+        encode_word = partial(self.encode_word, is_maori=is_maori)
         text = self.preprocess(text, vowel_type=self.vowel_type)
-        words = []
-        for word in TreebankWordTokenizer().tokenize(text):
-            from reo_toolkit import is_maori
+        if not self.treebank:
+            return map_words(text, encode_word)
 
-            if not is_maori(word):
-                words.append(word)
-                continue
-            encoded_text = []
-            for syllable in self.tokenize(word):
+        from nltk.tokenize import TreebankWordTokenizer
+
+        words = TreebankWordTokenizer().tokenize(text)
+        return self.detokenize([encode_word(word) for word in words])
+
+    def encode_word(self, word, is_maori):
+        if not is_maori(word):
+            return word
+        syllable_table = hangul_tables()[0]
+        encoded_text = []
+        for syllable in self.tokenize(word):
+            try:
+                encoded_text.append(syllable_table[syllable])
+            except KeyError:
                 if not all(ch in alphabet for ch in syllable):
                     encoded_text.append(syllable)
                     continue
-                if syllable in vowels:
-                    syllable = "ᄋ" + syllable
                 try:
-                    consonant, vowel = "".join(
-                        [self.encoder_dict[ch] for ch in syllable]
-                    )
+                    consonant, vowel = [self.encoder_dict[ch] for ch in syllable]
                 except KeyError:
                     logging.error(
                         "KeyError: phoneme {} not in encoder_dict".format(syllable)
                     )
                     raise KeyError
-                try:
-                    encoded = jamo.j2h(consonant, vowel)
-                except jamo.InvalidJamoError:
-                    logging.error(
-                        "InvalidJamoError - Consonant={} Vowel={} Syllable={}".format(
-                            consonant, vowel, syllable
-                        )
+                logging.error(
+                    "InvalidJamoError - Consonant={} Vowel={} Syllable={}".format(
+                        consonant, vowel, syllable
                     )
-                encoded_text.append(encoded)
-            words.append("".join(encoded_text))
-        encoded = self.detokenize(words)
-        return encoded
+                )
+                raise ValueError("{} is not a valid syllable".format(syllable))
+        return "".join(encoded_text)
 
     def decode(self, encoded_text):
-        decoded_sent = ""
-        for ch in encoded_text:
-            if jamo.is_hangul_char(ch):
-                decoded_sent += "".join(
-                    [self.decoder_dict[ch] for ch in jamo.hangul_to_jamo(ch)]
-                )
-            else:
-                decoded_sent += ch
-        return Base().decode(decoded_sent.replace("ᄋ", ""))
+        decoded_sent = encoded_text.translate(hangul_tables()[1])
+        base = (
+            get_encoder("base", treebank=True) if self.treebank else get_encoder("base")
+        )
+        return base.decode(decoded_sent.replace("ᄋ", ""))
+
+
+@lru_cache(maxsize=None)
+def hangul_tables():
+    """
+    Build lookup tables between every syllable the Syllable encoder knows (a
+    consonant or ᄋ followed by a vowel) and its precomposed Hangul character.
+
+    Returns a dict from syllables to Hangul, and a str.translate table back again.
+    """
+    import jamo
+
+    syllable_table = {}
+    hangul_table = {}
+    for consonant in consonants.union(["ᄋ"]):
+        for vowel in vowels:
+            if (
+                consonant not in Syllable.encoder_dict
+                or vowel not in Syllable.encoder_dict
+            ):
+                continue
+            hangul = jamo.j2h(
+                Syllable.encoder_dict[consonant], Syllable.encoder_dict[vowel]
+            )
+            syllable = vowel if consonant == "ᄋ" else consonant + vowel
+            syllable_table[syllable] = hangul
+            hangul_table[ord(hangul)] = syllable
+    return MappingProxyType(syllable_table), MappingProxyType(hangul_table)
+
+
+@lru_cache(maxsize=None)
+def load_json_map(filename):
+    """
+    Read a json map of syllables to characters and build the tables used to
+    encode and decode with it. This only happens once per file per process.
+    """
+    encoder_dict = json.loads(
+        pkgutil.get_data(__name__, filename),
+        object_pairs_hook=OrderedDict,
+    )
+    decoder_dict = {v: k for k, v in encoder_dict.items()}
+    decoder_table = {
+        ord(ch): replace_all(syllable, Base.decoder_dict.items())
+        for ch, syllable in decoder_dict.items()
+    }
+    return (
+        MappingProxyType(encoder_dict),
+        MappingProxyType(decoder_dict),
+        LongestMatch(encoder_dict),
+        MappingProxyType(decoder_table),
+    )
+
 
+class JsonMapEncoder(Encoder):
+    """
+    An encoder that maps syllables to single characters, as listed in a json file.
+
+    Text is encoded by replacing the longest syllable at each position from left
+    to right, and decoded with a translation table from characters to syllables.
+    """
+
+    filename = None
 
-class DoubleVowel:
     def __init__(self):
-        self.encoder_dict = json.loads(
-            pkgutil.get_data(__name__, "double_vowel.json"),
-            object_pairs_hook=OrderedDict,
+        self.encoder_dict, self.decoder_dict, self.encoder, self.decoder_table = (
+            load_json_map(self.filename)
         )
-        self.decoder_dict = {v: k for k, v in self.encoder_dict.items()}
 
     def encode(self, text):
-        text = Base().encode(text)
-        for syllable in self.encoder_dict:
-            text = text.replace(syllable, self.encoder_dict[syllable])
-        return text
+        return self.encoder.replace(get_encoder("base").encode(text))
 
     def decode(self, encoded):
-        decoded = ""
-        for ch in encoded:
-            if ch == " ":
-                decoded += ch
-                continue
-            try:
-                decoded += Base().decode(self.decoder_dict[ch])
-            except KeyError:
-                decoded += ch
-        return decoded
+        return encoded.translate(self.decoder_table)
 
 
-class LongSyllable:
-    def __init__(self):
-        self.encoder_dict = json.loads(
-            pkgutil.get_data(__name__, "long_syllable.json"),
-            object_pairs_hook=OrderedDict,
-        )
-        self.decoder_dict = {v: k for k, v in self.encoder_dict.items()}
+class DoubleVowel(JsonMapEncoder):
 
-    def encode(self, text):
-        text = Base().encode(text)
-        for syllable in self.encoder_dict:
-            text = text.replace(syllable, self.encoder_dict[syllable])
-        return text
+    filename = "double_vowel.json"
 
-    def decode(self, encoded):
-        decoded = ""
-        for ch in encoded:
-            if ch == " ":
-                decoded += ch
-                continue
-            try:
-                decoded += Base().decode(self.decoder_dict[ch])
-            except KeyError:
-                decoded += ch
-        return decoded
+
+class LongSyllable(JsonMapEncoder):
+
+    filename = "long_syllable.json"
+
+
+encoder_classes = {
+    "base": Base,
+    "single_vowel": SingleVowel,
+    "diphthong": Diphthong,
+    "syllable": Syllable,
+    "double_vowel": DoubleVowel,
+    "long_syllable": LongSyllable,
+}
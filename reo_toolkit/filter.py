@@ -0,0 +1,143 @@
+"""
+Filter a corpus down to the lines that are in te reo Māori.
+
+Lines are read from files (plain, .gz or .bz2) or stdin, classified with
+`is_maori` in chunks across a pool of worker processes, and written out in
+their original order. For example:
+
+    reo-filter corpus.txt.gz > maori.txt
+    cat corpus.txt | reo-filter --jobs -1 --output jsonl > labelled.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from . import wordlists
+from .reo_toolkit import is_maori_batch
+from .utils import text_file
+
+
+def read_chunks(filepaths, chunksize):
+    """Yield lists of up to chunksize lines, without newlines, from each file in turn."""
+    chunk = []
+    for filepath in filepaths:
+        with text_file(filepath) as f:
+            for line in f:
+                chunk.append(line.rstrip("\n"))
+                if len(chunk) == chunksize:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+def classify_chunks(chunks, strict=True, jobs=1):
+    """
+    Yield (chunk, verdicts) pairs in the same order as chunks.
+
+    With more than one job, chunks are classified in a process pool, with at most
+    two chunks per worker in flight so that memory use stays constant however
+    large the input is.
+    """
+    classify = partial(is_maori_batch, strict=strict)
+    if jobs == 1:
+        for chunk in chunks:
+            yield chunk, classify(chunk)
+        return
+
+    # Workers share one memory mapped copy of the wordlists
+    with ProcessPoolExecutor(
+        jobs, initializer=wordlists.attach, initargs=(wordlists.freeze(),)
+    ) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(classify, chunk)))
+            if len(pending) >= 2 * jobs:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="reo-filter",
+        description="Filter a corpus down to the lines that are in te reo Māori.",
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        default=["-"],
+        help="Input files, which may be .gz or .bz2 compressed. Defaults to stdin.",
+    )
+    parser.add_argument(
+        "-o",
+        "--outfile",
+        default="-",
+        help="Where to write the output, compressed if it ends in .gz or .bz2. Defaults to stdout.",
+    )
+    parser.add_argument(
+        "--output",
+        choices=["kept", "rejected", "jsonl"],
+        default="kept",
+        help="Write the Māori lines, the other lines, or every line labelled as JSON. Defaults to kept.",
+    )
+    parser.add_argument(
+        "--no-strict",
+        dest="strict",
+        action="store_false",
+        help="Also reject words in the non_maori and ambiguous word lists.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes, or -1 for one per core. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=10000,
+        help="Number of lines sent to a worker at a time. Defaults to 10000.",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Don't report throughput on stderr."
+    )
+    args = parser.parse_args(argv)
+
+    jobs = os.cpu_count() if args.jobs < 0 else args.jobs
+    start = time.perf_counter()
+    n_lines = n_kept = 0
+
+    with text_file(args.outfile, "w") as out:
+        chunks = read_chunks(args.files, args.chunksize)
+        for chunk, verdicts in classify_chunks(chunks, strict=args.strict, jobs=jobs):
+            for line, verdict in zip(chunk, verdicts):
+                if args.output == "jsonl":
+                    record = {"text": line, "is_maori": verdict}
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                elif verdict == (args.output == "kept"):
+                    out.write(line + "\n")
+            n_lines += len(chunk)
+            n_kept += sum(verdicts)
+
+    if not args.quiet:
+        elapsed = time.perf_counter() - start
+        print(
+            "{} lines in {:.1f}s ({:.0f} lines/sec), {} kept".format(
+                n_lines, elapsed, n_lines / elapsed if elapsed else 0, n_kept
+            ),
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,29 @@
 import re
 import warnings
+from functools import lru_cache
+
+ones = ["kore", "tahi", "rua", "toru", "whā", "rima", "ono", "whitu", "waru", "iwa"]
+places = ["", "tekau", "rau", "mano", "tekau", "rau"]
+
+digits = re.compile(r"\d+")
+pounds = re.compile(r"£([0-9]+)(?:.|\Z)", re.DOTALL)
+dollars = re.compile(r"\$([0-9]+)(?:.|\Z)", re.DOTALL)
+# A hyphen or percent sign straight after a digit, where the hyphen is a range
+ranges_and_percents = re.compile(r"(?<=[0-9])(?:-(?=[0-9])|%)")
+
+# Tidy ups applied in order to the words for a number
+spelling_fixes = [
+    (re.compile("tahi tekau"), "tekau"),
+    (re.compile("mano kotahi"), "mano"),
+    (re.compile("mā kotahi"), "mā tahi"),
+    (re.compile("^mā"), ""),
+    (re.compile(r"\s{2,}"), " "),
+]
 
 
 def convert_numbers(text):
     text = prepare_numbers(text)
-    return re.sub("\d+", lambda x: digits_to_text(int(x.group())), text)
+    return digits.sub(lambda x: digits_to_text(int(x.group())), text)
 
 
 def prepare_numbers(text):
@@ -12,52 +31,43 @@ def prepare_numbers(text):
     This function removes dollar ($) and pound (£) symbols
     and also percent (%) symbols, replacing the text with the
     correct māori usage for each term.
+
+    Pounds, then dollars, then ranges (1-2) and percentages are each converted
+    in a single pass over the text, with another pass for money only when there
+    were symbols next to each other. The character straight after an amount of
+    money is dropped, and trailing whitespace is stripped once any money has
+    been converted.
     """
+    converted = False
     while True:
-        if re.search("£[0-9]+", text):
-            start, finish = re.search("£[0-9]+", text).span()
-            text = (
-                text[:start]
-                + text[start + 1 : finish]
-                + str.rstrip(" pāuna " + text[finish + 1 :])
-            )
-        elif "$" in text:
-            start, finish = re.search(r"\$[0-9]+", text).span()
-            text = (
-                text[:start]
-                + text[start + 1 : finish]
-                + str.rstrip(" tāra " + text[finish + 1 :])
-            )
-        elif re.search(r"[0-9]\-[0-9]", text):
-            start, finish = re.search(r"[0-9]\-[0-9]", text).span()
-            text = text[: start + 1] + " ki te " + text[finish - 1 :]
-        elif re.search("[0-9]%", text):
-            start, finish = re.search("[0-9]%", text).span()
-            text = text[: start + 1] + " paihēneti" + text[finish:]
-        else:
-            break
+        # Removing a symbol can leave another one right before the digits, e.g.
+        # £$5, so keep going until nothing changes, always doing pounds first
+        if "£" in text:
+            text, n = pounds.subn(r"\1 pāuna ", text)
+            if n:
+                converted = True
+                continue
+        if "$" in text:
+            text, n = dollars.subn(r"\1 tāra ", text)
+            if n:
+                converted = True
+                continue
+        break
+    if converted:
+        text = text.rstrip()
+    if "-" in text or "%" in text:
+        text = ranges_and_percents.sub(
+            lambda m: " ki te " if m.group() == "-" else " paihēneti", text
+        )
     return text
 
 
-def digits_to_text(num, warn=True):
-
-    if warn and abs(num) >= 1000000:
-        warnings.warn("Only numbers below 1,000,000 can be translated")
-        return str(num)
-
-    digits = [int(i) for i in str(num)]
-
-    ones = ["kore", "tahi", "rua", "toru", "whā", "rima", "ono", "whitu", "waru", "iwa"]
-    places = ["rau", "tekau", "mano", "rau", "tekau", ""]
-
-    ones_dict = dict(zip([i for i in range(10)], ones))
-    places_dict = dict(zip([5, 4, 3, 2, 1, 0], places))
-
+def spell_digits(num):
+    """Write out num in words, one digit at a time."""
     digit_words = []
-    for place, digit in enumerate(digits[::-1]):
-        ones_digit = ones_dict[digit]
-
-        place_digit = places_dict[place]
+    for place, digit in enumerate(reversed(str(num))):
+        ones_digit = ones[int(digit)]
+        place_digit = places[place]
 
         if ones_digit == "kore" and num != 0:
             if place_digit == "mano":
@@ -69,16 +79,142 @@ def digits_to_text(num, warn=True):
         elif place in [0, 3]:
             ones_digit = "mā " + ones_digit
 
-        place_words = str.strip(ones_digit + " " + place_digit)
+        digit_words.append((ones_digit + " " + place_digit).strip())
 
-        digit_words.append(place_words)
+    digit_text = " ".join(reversed(digit_words))
+    for pattern, replacement in spelling_fixes:
+        digit_text = pattern.sub(replacement, digit_text)
+    return digit_text.strip()
 
-    digit_text = " ".join(digit_words[::-1])
 
-    digit_text = re.sub("tahi tekau", "tekau", digit_text)
-    digit_text = re.sub("mano kotahi", "mano", digit_text)
-    digit_text = re.sub("mā kotahi", "mā tahi", digit_text)
-    digit_text = re.sub("^mā", "", digit_text)
-    digit_text = re.sub(r"\s{2,}", " ", digit_text)
+@lru_cache(maxsize=None)
+def number_tables():
+    """
+    Build tables of the words for 0-999, for 1,000-999,000 in thousands, and for
+    1-999 when they follow a number of thousands (with a space in front).
 
-    return digit_text.strip()
+    Every number below a million is the words for its thousands followed by the
+    words for the rest, e.g. 1,100 is "kotahi mano" + " rau" since "kotahi" is
+    dropped after "mano".
+    """
+    below_thousand = [spell_digits(num) for num in range(1000)]
+    thousands = [""] + [spell_digits(num * 1000) for num in range(1, 1000)]
+    prefix = len("kotahi mano")
+    after_thousands = [""] + [
+        spell_digits(1000 + num)[prefix:] for num in range(1, 1000)
+    ]
+    return below_thousand, thousands, after_thousands
+
+
+@lru_cache(maxsize=None)
+def number_arrays():
+    """The tables from `number_tables` as numpy arrays, for indexing with arrays."""
+    import numpy as np
+
+    below_thousand, thousands, after_thousands = number_tables()
+    return (
+        np.array(below_thousand, dtype=object),
+        np.array(thousands, dtype=object),
+        np.array(after_thousands, dtype=object),
+    )
+
+
+def digits_to_text(num, warn=True):
+
+    if warn and abs(num) >= 1000000:
+        warnings.warn("Only numbers below 1,000,000 can be translated")
+        return str(num)
+
+    if 0 <= num < 1000000:
+        below_thousand, thousands, after_thousands = number_tables()
+        if num < 1000:
+            return below_thousand[num]
+        n_thousands, rest = divmod(num, 1000)
+        return thousands[n_thousands] + after_thousands[rest]
+
+    return spell_digits(num)
+
+
+def digits_to_text_many(values, errors="warn"):
+    """
+    Write out many numbers in words at once, e.g. a column of a dataframe.
+
+    NumPy arrays, and anything with a to_numpy method like a pandas Series, are
+    split into thousands and the rest with vectorised integer arithmetic, and
+    their words are put together from the same tables as `digits_to_text`. Any
+    other iterable of ints is looked up one number at a time.
+
+    Parameters:
+    values (iterable): Integers from 0 to 999,999.
+    errors (str): What to do with values outside that range. "warn" gives one
+        warning for all of them and leaves them as digits, "mask" gives None
+        for them instead, and "raise" raises a ValueError. Defaults to "warn".
+
+    Returns:
+    list: The words for each value, or a numpy array of objects if values was
+    an array.
+
+    Examples:
+    >>> digits_to_text_many([1, 20, 1100])
+    ['tahi', 'rua tekau', 'kotahi mano rau']
+    """
+    assert errors in [
+        "warn",
+        "mask",
+        "raise",
+    ], "Invalid errors! Choose one of 'warn', 'mask' or 'raise'"
+
+    if hasattr(values, "to_numpy") or type(values).__module__ == "numpy":
+        return digits_to_text_array(values, errors)
+
+    below_thousand, thousands, after_thousands = number_tables()
+    texts = []
+    n_invalid = 0
+    for num in values:
+        if 0 <= num < 1000:
+            texts.append(below_thousand[num])
+        elif 1000 <= num < 1000000:
+            n_thousands, rest = divmod(num, 1000)
+            texts.append(thousands[n_thousands] + after_thousands[rest])
+        elif errors == "raise":
+            raise ValueError("{} is not between 0 and 999,999".format(num))
+        else:
+            n_invalid += 1
+            texts.append(None if errors == "mask" else str(num))
+    if n_invalid and errors == "warn":
+        warn_invalid(n_invalid)
+    return texts
+
+
+def digits_to_text_array(values, errors="warn"):
+    import numpy as np
+
+    array = np.asarray(values)
+    assert np.issubdtype(array.dtype, np.integer), "values must be integers"
+    below_thousand, thousands, after_thousands = number_arrays()
+
+    invalid = (array < 0) | (array >= 1000000)
+    n_invalid = int(invalid.sum())
+    if n_invalid and errors == "raise":
+        raise ValueError(
+            "{} is not between 0 and 999,999".format(array[invalid].flat[0])
+        )
+    n_thousands, rest = np.divmod(np.where(invalid, 0, array), 1000)
+    # Below a thousand, thousands[0] is "" and the rest is spelt on its own
+    rest_words = np.where(n_thousands == 0, below_thousand[rest], after_thousands[rest])
+    texts = thousands[n_thousands] + rest_words
+
+    if n_invalid:
+        if errors == "mask":
+            texts[invalid] = None
+        else:
+            texts[invalid] = array[invalid].astype(str)
+            warn_invalid(n_invalid)
+    return texts
+
+
+def warn_invalid(n_invalid):
+    warnings.warn(
+        "Only numbers from 0 to 999,999 can be translated, "
+        "so {} were left as digits".format(n_invalid)
+    )
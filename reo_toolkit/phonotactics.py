@@ -0,0 +1,134 @@
+"""
+A single pass validator for the rules of Māori phonotactics used by `is_maori`.
+
+Each character is looked up in a table of letter classes built from
+`letters.alphabet`, and the digraphs ng and wh are folded into single
+consonants on the fly, so a token is checked in one left to right scan
+without encoding it first. The first rule broken is reported in the same
+order of priority that `is_maori` has always used.
+"""
+
+from enum import IntEnum
+
+from .letters import vowels, consonants, numbers
+
+
+class Rule(IntEnum):
+    """The rules a token can break, from highest to lowest priority."""
+
+    NON_MAORI_LETTER = 1
+    NON_MAORI_WORD = 2
+    AMBIGUOUS_WORD = 3
+    SINGLE_CONSONANT = 4
+    TRIPLE_VOWEL = 5
+    DOUBLE_CONSONANT = 6
+    ENDS_WITH_CONSONANT = 7
+    PACIFIC_ISLAND = 8
+    ALPHANUM = 9
+    # The text has a leading or trailing hyphen, so splitting it gives an
+    # empty token
+    EMPTY_SPLIT = 10
+
+
+OTHER, SHORT_VOWEL, LONG_VOWEL, CONSONANT, DIGIT, NON_MAORI, APOSTROPHE = range(7)
+
+letter_classes = {}
+for ch in vowels:
+    letter_classes[ch] = SHORT_VOWEL if ch in "aeiouAEIOU" else LONG_VOWEL
+for ch in consonants:
+    letter_classes[ch] = CONSONANT
+for ch in numbers:
+    letter_classes[ch] = DIGIT
+# The long s (ſ) is included because it matches s case insensitively
+for ch in "ʻbcdfgjlqsvxyzBCDFGJLQSVXYZſ":
+    letter_classes[ch] = NON_MAORI
+letter_classes["'"] = APOSTROPHE
+
+digraphs = {"ng", "Ng", "NG", "wh", "Wh", "WH"}
+
+
+def scan(text):
+    """
+    Check a token against the letter-level rules in a single pass.
+
+    Returns a tuple (length, failure) where length is the number of letters once
+    ng and wh are counted as one, and failure is None or a tuple (rule, start, end)
+    giving the highest priority rule broken and where it was first broken in text.
+    A non-Māori letter stops the scan straight away, so length is only counted up to
+    that letter.
+    """
+
+    get_class = letter_classes.get
+    n = len(text)
+    i = 0
+    length = 0
+    triple_vowel = double_consonant = ends_with_consonant = None
+    pacific_island = alphanum = None
+    # Class, character and start offset of the previous two letters
+    class1 = class2 = OTHER
+    ch1 = ch2 = None
+    start1 = start2 = 0
+    run_start = -1
+    first_run = True
+    digit_run = False
+    while i < n:
+        start = i
+        ch = text[i]
+        cls = get_class(ch, OTHER)
+        if cls == CONSONANT and text[i : i + 2] in digraphs:
+            i += 2
+        else:
+            i += 1
+        if cls == NON_MAORI:
+            return length + 1, (Rule.NON_MAORI_LETTER, start, i)
+        length += 1
+
+        is_vowel = cls == SHORT_VOWEL or cls == LONG_VOWEL
+        if is_vowel:
+            if ch == ch1 == ch2 and triple_vowel is None:
+                triple_vowel = (Rule.TRIPLE_VOWEL, start2, i)
+            if (
+                cls == SHORT_VOWEL
+                and class1 == APOSTROPHE
+                and class2 == SHORT_VOWEL
+                and pacific_island is None
+            ):
+                pacific_island = (Rule.PACIFIC_ISLAND, start2, i)
+        elif class1 == CONSONANT and double_consonant is None:
+            double_consonant = (Rule.DOUBLE_CONSONANT, start1, i)
+
+        if is_vowel or cls == CONSONANT:
+            if run_start < 0:
+                run_start = start
+            digit_run = False
+        else:
+            if cls == DIGIT and digit_run:
+                alphanum = (Rule.ALPHANUM, alphanum[1], i)
+            if run_start >= 0:
+                if first_run:
+                    first_run = False
+                    if class1 == CONSONANT:
+                        ends_with_consonant = (Rule.ENDS_WITH_CONSONANT, start1, start)
+                if cls == DIGIT and alphanum is None:
+                    alphanum = (Rule.ALPHANUM, run_start, i)
+                    digit_run = True
+                run_start = -1
+            if cls != DIGIT:
+                digit_run = False
+
+        class2, ch2, start2 = class1, ch1, start1
+        class1, ch1, start1 = cls, ch, start
+
+    if run_start >= 0 and first_run and class1 == CONSONANT:
+        ends_with_consonant = (Rule.ENDS_WITH_CONSONANT, start1, n)
+
+    for failure in (
+        triple_vowel,
+        double_consonant,
+        ends_with_consonant,
+        pacific_island,
+        alphanum,
+    ):
+        if failure is not None:
+            return length, failure
+    return length, None
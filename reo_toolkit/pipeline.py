@@ -0,0 +1,346 @@
+"""
+Encode a whole corpus in parallel, e.g. before training a tokenizer on it.
+
+Each input file is split into shards of roughly equal size at line boundaries,
+by byte offset, and the shards are processed across a pool of worker
+processes. Each line can be filtered with `is_maori` and have its numbers
+written out in words with `convert_numbers` before it is encoded. Workers write
+their shards straight to disk, then the parts are either joined in their
+original order into one file or kept as they are, alongside a json manifest
+describing every shard. For example:
+
+    reo-pipeline corpus.txt --encoder long_syllable --filter -j -1 -o encoded.txt
+    reo-pipeline corpus.txt --encoder syllable --shards 16 --outdir encoded/
+
+Compressed (.gz or .bz2) files can't be split by byte offset, so each one is a
+single shard.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from . import wordlists
+from .corpus import MappedCorpus
+from .encoders import encoder_classes, get_encoder, map_lines
+from .utils import text_file
+
+Shard = namedtuple("Shard", ["index", "filepath", "start", "end", "outpath"])
+
+
+def is_compressed(filepath):
+    return filepath.endswith(".gz") or filepath.endswith(".bz2")
+
+
+def shard_offsets(filepath, n_shards):
+    """
+    Split a file into up to n_shards (start, end) byte ranges of about the same
+    size, each starting at the beginning of a line.
+    """
+    with MappedCorpus(filepath) as corpus:
+        return corpus.partition(n_shards)
+
+
+def read_shard(shard):
+    """Yield the lines of a shard, without newlines."""
+    if shard.end is None:
+        with text_file(shard.filepath) as f:
+            for line in f:
+                yield line.rstrip("\n")
+        return
+    with MappedCorpus(shard.filepath, shard.start, shard.end) as corpus:
+        yield from corpus
+
+
+def process_shard(
+    shard,
+    encoder="base",
+    filter_maori=False,
+    strict=True,
+    numbers=False,
+    chunksize=10000,
+):
+    """
+    Filter, convert the numbers in and encode the lines of a shard, writing them
+    to shard.outpath.
+
+    Returns a dict describing the shard for the manifest.
+    """
+    from .reo_toolkit import is_maori_batch
+    from .numbers import convert_numbers
+
+    start = time.perf_counter()
+    encode = get_encoder(encoder).encode
+    n_lines = n_kept = 0
+
+    def process(chunk):
+        if filter_maori:
+            chunk = [
+                line
+                for line, verdict in zip(chunk, is_maori_batch(chunk, strict=strict))
+                if verdict
+            ]
+        if numbers:
+            chunk = [convert_numbers(line) for line in chunk]
+        text = "\n".join(map_lines(encode, chunk)) + "\n" if chunk else ""
+        return text, len(chunk)
+
+    with open(shard.outpath, "w", encoding="utf-8") as out:
+        chunk = []
+        for line in read_shard(shard):
+            chunk.append(line)
+            if len(chunk) == chunksize:
+                text, kept = process(chunk)
+                out.write(text)
+                n_lines += len(chunk)
+                n_kept += kept
+                chunk = []
+        if chunk:
+            text, kept = process(chunk)
+            out.write(text)
+            n_lines += len(chunk)
+            n_kept += kept
+
+    return {
+        "index": shard.index,
+        "input": shard.filepath,
+        "start": shard.start,
+        "end": shard.end,
+        "output": shard.outpath,
+        "lines": n_lines,
+        "kept": n_kept,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def make_shards(filepaths, n_shards, outdir):
+    """
+    Split the input files into shards, sharing n_shards between the files in
+    proportion to their size, with one output file in outdir for each shard.
+    """
+    sizes = [0 if is_compressed(path) else os.path.getsize(path) for path in filepaths]
+    total = sum(sizes) or 1
+    shards = []
+    for filepath, size in zip(filepaths, sizes):
+        if is_compressed(filepath):
+            ranges = [(0, None)]
+        else:
+            ranges = shard_offsets(filepath, max(1, round(n_shards * size / total)))
+        for start, end in ranges:
+            outpath = os.path.join(outdir, "part-{:05d}.txt".format(len(shards)))
+            shards.append(Shard(len(shards), filepath, start, end, outpath))
+    return shards
+
+
+def run_pipeline(
+    filepaths,
+    outfile=None,
+    outdir=None,
+    encoder="base",
+    filter_maori=False,
+    strict=True,
+    numbers=False,
+    jobs=1,
+    n_shards=None,
+    chunksize=10000,
+    manifest=None,
+):
+    """
+    Encode files in parallel, writing either one ordered outfile or one file
+    per shard in outdir.
+
+    Parameters:
+    filepaths (list): Input files, which may be .gz or .bz2 compressed.
+    outfile (str): Where to write every line in order, or '-' for stdout.
+    outdir (str): A directory to write one part-NNNNN.txt per shard to instead.
+    encoder (str): The name of the encoder to use, e.g. "long_syllable".
+    filter_maori (bool): Only keep the lines that `is_maori` accepts.
+    strict (bool): Passed on to `is_maori` when filtering.
+    numbers (bool): Write numbers out in words with `convert_numbers` first.
+    jobs (int): Number of worker processes, or -1 for one per core.
+    n_shards (int): How many shards to split the input into. Defaults to jobs.
+    chunksize (int): Number of lines encoded at a time.
+    manifest (str): Where to write the manifest. Defaults to outfile with
+        .manifest.json added, or manifest.json in outdir.
+
+    Returns:
+    dict: The manifest.
+    """
+    assert (outfile is None) != (outdir is None), "Give one of outfile or outdir"
+    assert encoder in encoder_classes, "Invalid encoder! Choose one of {}".format(
+        ", ".join(encoder_classes)
+    )
+    jobs = os.cpu_count() if jobs < 0 else jobs
+    n_shards = n_shards or jobs
+    start = time.perf_counter()
+
+    if outdir is not None:
+        os.makedirs(outdir, exist_ok=True)
+        partdir = outdir
+    else:
+        partdir = tempfile.mkdtemp(
+            dir=None if outfile == "-" else os.path.dirname(os.path.abspath(outfile))
+        )
+    if manifest is None and outfile != "-":
+        manifest = (
+            os.path.join(outdir, "manifest.json")
+            if outdir is not None
+            else outfile + ".manifest.json"
+        )
+
+    shards = make_shards(filepaths, n_shards, partdir)
+    process = partial(
+        process_shard,
+        encoder=encoder,
+        filter_maori=filter_maori,
+        strict=strict,
+        numbers=numbers,
+        chunksize=chunksize,
+    )
+    try:
+        if jobs == 1:
+            results = list(map(process, shards))
+        else:
+            # Workers share one memory mapped copy of the wordlists
+            with ProcessPoolExecutor(
+                jobs, initializer=wordlists.attach, initargs=(wordlists.freeze(),)
+            ) as executor:
+                results = list(executor.map(process, shards))
+
+        if outfile is not None:
+            with text_file(outfile, "w") as out:
+                # The parts are already UTF-8, so copy their bytes as they are
+                out.flush()
+                for result in results:
+                    with open(result["output"], "rb") as part:
+                        shutil.copyfileobj(part, out.buffer)
+                    result["output"] = outfile
+    finally:
+        if outdir is None:
+            shutil.rmtree(partdir, ignore_errors=True)
+
+    summary = {
+        "encoder": encoder,
+        "filter_maori": filter_maori,
+        "strict": strict,
+        "numbers": numbers,
+        "jobs": jobs,
+        "inputs": list(filepaths),
+        "output": outfile if outfile is not None else outdir,
+        "lines": sum(result["lines"] for result in results),
+        "kept": sum(result["kept"] for result in results),
+        "seconds": round(time.perf_counter() - start, 3),
+        "shards": results,
+    }
+    if manifest is not None:
+        with open(manifest, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="reo-pipeline",
+        description="Encode a corpus in parallel, optionally keeping only te reo Māori.",
+    )
+    parser.add_argument(
+        "files", nargs="+", help="Input files, which may be .gz or .bz2 compressed."
+    )
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument(
+        "-o",
+        "--outfile",
+        help="Write every line in its original order to this file, or - for stdout.",
+    )
+    output.add_argument(
+        "--outdir", help="Write one part-NNNNN.txt file per shard to this directory."
+    )
+    parser.add_argument(
+        "-e",
+        "--encoder",
+        choices=list(encoder_classes),
+        default="base",
+        help="The encoder to use. Defaults to base.",
+    )
+    parser.add_argument(
+        "--filter",
+        dest="filter_maori",
+        action="store_true",
+        help="Only keep the lines that are in te reo Māori.",
+    )
+    parser.add_argument(
+        "--no-strict",
+        dest="strict",
+        action="store_false",
+        help="When filtering, also reject words in the non_maori and ambiguous word lists.",
+    )
+    parser.add_argument(
+        "--numbers",
+        action="store_true",
+        help="Write numbers out in te reo Māori before encoding.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes, or -1 for one per core. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Number of shards to split the input into. Defaults to the number of jobs.",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=10000,
+        help="Number of lines encoded at a time. Defaults to 10000.",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="Where to write the json manifest. Defaults to next to the output.",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Don't report throughput on stderr."
+    )
+    args = parser.parse_args(argv)
+
+    summary = run_pipeline(
+        args.files,
+        outfile=args.outfile,
+        outdir=args.outdir,
+        encoder=args.encoder,
+        filter_maori=args.filter_maori,
+        strict=args.strict,
+        numbers=args.numbers,
+        jobs=args.jobs,
+        n_shards=args.shards,
+        chunksize=args.chunksize,
+        manifest=args.manifest,
+    )
+
+    if not args.quiet:
+        elapsed = summary["seconds"]
+        print(
+            "{} lines in {:.1f}s ({:.0f} lines/sec), {} kept, {} shards".format(
+                summary["lines"],
+                elapsed,
+                summary["lines"] / elapsed if elapsed else 0,
+                summary["kept"],
+                len(summary["shards"]),
+            ),
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
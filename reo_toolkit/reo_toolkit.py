@@ -1,21 +1,23 @@
 import os
 import re
-import logging
-
-from inflection import camelize
-from functools import lru_cache
+from collections import namedtuple
+from functools import partial
 
+from . import wordlists
+from .cache import TokenCache
 from .utils import is_camel_case, camel_case_split
-from .wordlists import ambiguous, non_maori
-from .encoders import Base
-from .letters import vowels, consonants, alphabet, numbers
+from .encoders import get_encoder
+from .letters import consonants
+from .phonotactics import Rule, scan
+
+splitter = re.compile(r"[\s\n\-]+")
+
+# Verdicts for individual tokens, keyed on (token, strict)
+token_cache = TokenCache()
 
-double_consonants = re.compile("[{}][^{}]".format("".join(consonants), "".join(vowels)))
-non_maori_letters = re.compile("[ʻbcdfgjlqsvxyz]", re.IGNORECASE)
-triple_vowels = re.compile("|".join([r"{}{{3}}".format(ch) for ch in vowels]))
-pacific_island = re.compile("[aeiouAEIOU]'[aeiouAEIOU]")
-alphanum = re.compile("[{}]+[0-9]+".format("".join(alphabet)))
-ends_with_consonant = re.compile("[{}]+".format("".join(consonants) + "".join(vowels)))
+# Why a text was rejected: the rule broken, the span of text where it was
+# broken and the index of the token it was in
+Reason = namedtuple("Reason", ["rule", "start", "end", "index"])
 
 
 def is_maori(text, strict=True, verbose=False):
@@ -29,7 +31,7 @@ def is_maori(text, strict=True, verbose=False):
     Parameters:
     text (str): The text to be evaluated.
     strict (bool): If True, enforces stricter checks against a predefined non-Māori word list and ambiguous words. Defaults to True.
-    verbose (bool): If True, enables detailed debug output to the console. Defaults to False.
+    verbose (bool): If True, prints why each token was rejected. Defaults to False.
 
     Returns:
     bool: True if the text is determined to be Māori, False otherwise.
@@ -42,6 +44,7 @@ def is_maori(text, strict=True, verbose=False):
       triple vowels, double consonants, and words ending with consonants.
     - When `strict` is set to False, the function allows for some leniency in recognizing words
       that might be Māori.
+    - Use `explain_maori` to find out which rule a rejected text broke.
 
     Examples:
     >>> is_maori("kia ora")
@@ -55,108 +58,313 @@ def is_maori(text, strict=True, verbose=False):
     """
 
     if verbose:
-        logging.debug = print
+        result = True
+        for rule, start, end, checked, _, _ in _rejections(text, strict):
+            print(rejection_message(checked, rule, start, end))
+            result = False
+        return result
 
     text = text.strip()
 
-    splitter = re.compile(r"[\s\n\-]+")
     if splitter.search(text):
         # Split the text and evaluate each piece
-        results = []
         for split in splitter.split(text):
             if len(split) == 0:
-                logging.debug("Text {} gives an empty string when split".format(text))
                 return False
-            results.append(is_maori(split, strict=strict, verbose=verbose))
-        return all(results)
+            if not is_maori_token(split, strict=strict):
+                return False
+        return True
+
+    return is_maori_token(text, strict=strict)
+
+
+def explain_maori(text, strict=True):
+    """
+    Find out why `is_maori` rejects a text.
+
+    Parameters:
+    text (str): The text to be evaluated.
+    strict (bool): Passed through to `is_maori`. Defaults to True.
+
+    Returns:
+    Reason: None if `is_maori` accepts the text, otherwise a Reason(rule, start,
+    end, index) for the first token rejected, where rule is a `Rule`,
+    text[start:end] is where the rule was broken and index is the position of
+    the token in the text. Count the rules of many Reasons to see why the lines
+    of a corpus were rejected.
+
+    Examples:
+    >>> explain_maori("kia ora")
+    >>> explain_maori("kia ora hello")
+    Reason(rule=<Rule.NON_MAORI_LETTER: 1>, start=10, end=11, index=2)
+    >>> explain_maori("-kia ora")
+    Reason(rule=<Rule.EMPTY_SPLIT: 10>, start=0, end=0, index=0)
+    """
+
+    for rule, start, end, _, index, offset in _rejections(text, strict):
+        return Reason(rule, offset + start, offset + end, index)
+    return None
+
+
+def _rejections(text, strict):
+    """
+    Yield (rule, start, end, checked, index, offset) for every token `is_maori`
+    rejects in text, stopping at the first empty token. checked is the text the
+    rule was checked against (see `explain_token`), checked[start:end] is where
+    it was broken, and offset is where checked starts in text.
+    """
+
+    offset = len(text) - len(text.lstrip())
+    stripped = text.strip()
+    # The start and end of every token, which lie between the separators
+    bounds = [0]
+    for match in splitter.finditer(stripped):
+        bounds += match.span()
+    bounds.append(len(stripped))
+    n_tokens = len(bounds) // 2
+
+    for index in range(n_tokens):
+        start, end = bounds[2 * index], bounds[2 * index + 1]
+        token = stripped[start:end]
+        if not token and n_tokens > 1:
+            yield Rule.EMPTY_SPLIT, start, end, stripped, index, offset
+            return
+        # Most tokens are accepted, which the cache knows without explaining
+        if is_maori_token(token, strict=strict):
+            continue
+        failure = explain_token(token, strict=strict)
+        if failure is not None:
+            rule, first, last, checked, position = failure
+            yield rule, first, last, checked, index, offset + start + position
+
+
+def is_maori_batch(texts, strict=True, n_jobs=1, chunksize=10000):
+    """
+    Determine which of many texts are in Māori language.
+
+    Gives the same verdicts as calling `is_maori` on each text, but splits every
+    text into tokens up front and classifies each distinct token only once, which
+    is much faster on real corpora where the same words appear over and over.
+
+    Parameters:
+    texts (iterable of str): The texts to be evaluated, e.g. the lines of a corpus.
+    strict (bool): Passed through to `is_maori`. Defaults to True.
+    n_jobs (int): Number of worker processes. 1 classifies in this process and -1
+        uses every core. Defaults to 1.
+    chunksize (int): Number of texts sent to a worker at a time when n_jobs != 1.
+
+    Returns:
+    list of bool: One verdict per text, in input order.
+
+    Examples:
+    >>> is_maori_batch(["kia ora", "hello", "kia ora"])
+    [True, False, True]
+    """
+
+    if n_jobs != 1:
+        if n_jobs < 0:
+            n_jobs = os.cpu_count()
+        from multiprocessing import Pool
+
+        # Workers share one memory mapped copy of the wordlists
+        with Pool(
+            n_jobs, initializer=wordlists.attach, initargs=(wordlists.freeze(),)
+        ) as pool:
+            chunks = pool.imap(
+                partial(is_maori_batch, strict=strict), _chunked(texts, chunksize)
+            )
+            return [verdict for chunk in chunks for verdict in chunk]
+
+    verdicts = {}
+    results = []
+    for text in texts:
+        splits = splitter.split(text.strip())
+        result = True
+        for split in splits:
+            if len(split) == 0 and len(splits) > 1:
+                result = False
+                break
+            try:
+                verdict = verdicts[split]
+            except KeyError:
+                verdict = verdicts[split] = is_maori_token(split, strict=strict)
+            if not verdict:
+                result = False
+                break
+        results.append(result)
+    return results
+
+
+def maori_ratio(text, strict=True, weighted=False, threshold=None):
+    """
+    Measure what fraction of a text is in Māori language, e.g. to score a web page.
+
+    The text is split into tokens the same way as `is_maori`, and each distinct
+    token is classified once with `is_maori_token`.
+
+    Parameters:
+    text (str): The text to be evaluated.
+    strict (bool): Passed through to `is_maori`. Defaults to True.
+    weighted (bool): If True, weight each token by its number of characters
+        instead of counting every token once. Defaults to False.
+    threshold (float): If given, stop as soon as the ratio is certain to be at
+        least threshold, or certain to be below it. The result is then a bound
+        on the ratio rather than the ratio itself, but comparing it with
+        threshold still gives the right answer. Defaults to None.
+
+    Returns:
+    float: The fraction of tokens (or characters) that are Māori, or 0.0 for a
+    text with no tokens.
+
+    Examples:
+    >>> maori_ratio("kia ora hello world")
+    0.5
+    >>> maori_ratio("kia ora hello world", weighted=True)
+    0.375
+    >>> maori_ratio("hello world kia ora", threshold=0.8) < 0.8
+    True
+    """
+
+    tokens = [split for split in splitter.split(text.strip()) if split]
+    if weighted:
+        total = sum(map(len, tokens))
+    else:
+        total = len(tokens)
+    if total == 0:
+        return 0.0
+
+    verdicts = {}
+    maori = 0
+    # Weight of the tokens not classified yet
+    remaining = total
+    for token in tokens:
+        weight = len(token) if weighted else 1
+        remaining -= weight
+        try:
+            verdict = verdicts[token]
+        except KeyError:
+            verdict = verdicts[token] = is_maori_token(token, strict=strict)
+        if verdict:
+            maori += weight
+        if threshold is not None:
+            if maori / total >= threshold:
+                return maori / total
+            if (maori + remaining) / total < threshold:
+                return (maori + remaining) / total
+    return maori / total
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def is_maori_token(text, strict=True, cache=True):
+    """
+    Determine if a single token, containing no whitespace or hyphens, is in Māori language.
+
+    This is the per-word part of `is_maori`, applied after the text has been split.
+    Verdicts are remembered in `token_cache` unless `cache` is False, so repeated
+    words cost a single lookup.
+    """
+
+    if cache:
+        key = (text, strict)
+        verdict = token_cache.get(key)
+        if verdict is None:
+            verdict = explain_token(text, strict=strict) is None
+            token_cache.put(key, verdict)
+        return verdict
+
+    return explain_token(text, strict=strict) is None
+
+
+def explain_token(text, strict=True):
+    """
+    Find out why `is_maori_token` rejects a token.
+
+    Returns None if the token is accepted, otherwise a tuple (rule, start, end,
+    checked, offset) where checked is the text the `Rule` was checked against,
+    checked[start:end] is where it was broken and checked starts at text[offset].
+    checked is the token itself, except for camelCase tokens where it is the part
+    that broke the rule, in lower case. Nothing is formatted or logged, so this
+    is as fast as `is_maori_token` without the cache.
+    """
 
     if is_camel_case(text):
-        return all(
-            is_maori(sub.lower(), strict=strict, verbose=verbose)
-            for sub in camel_case_split(text)
-        )
+        # Each part is checked on its own, in lower case
+        position = 0
+        for sub in camel_case_split(text):
+            failure = explain_token(sub.lower(), strict=strict)
+            if failure is not None:
+                rule, start, end, checked, offset = failure
+                return rule, start, end, checked, position + offset
+            position += len(sub)
+        return None
 
-    raw_text = text
-    text = Base().encode(text)
+    length, failure = scan(text)
 
     # Match letters found not in the māori alphabet
-    non_maori_letters_result = non_maori_letters.search(text)
-    if non_maori_letters_result:
-        logging.debug(
-            "Letter '{}' not in maori character set".format(
-                non_maori_letters_result.group()
-            )
-        )
-        return False
+    if failure and failure[0] == Rule.NON_MAORI_LETTER:
+        return failure + (text, 0)
 
-    if len(text) == 0:
-        if re.search("[A-z]", raw_text):
-            # String is empty
-            logging.debug("String {} is empty after cleaning".format(raw_text))
-            return False
-        else:
-            return True
+    if length == 0:
+        return None
 
     if not strict:
-        if text.lower() in non_maori:
-            logging.debug("Text {} is in non_maori word list".format(text))
-            return False
-
-        if text.lower() in ambiguous:
-            logging.debug("Text {} is in ambiguous word list".format(text))
-            return False
-
-    if len(text) == 1:
-        if text in consonants:
-            logging.debug("Single character word {} is a consonant".format(text))
-            return False
+        encoded = get_encoder("base").encode(text).lower()
+        if encoded in wordlists.non_maori:
+            return Rule.NON_MAORI_WORD, 0, len(text), text, 0
+
+        if encoded in wordlists.ambiguous:
+            return Rule.AMBIGUOUS_WORD, 0, len(text), text, 0
+
+    if length == 1:
+        if text[0] in consonants:
+            return Rule.SINGLE_CONSONANT, 0, len(text), text, 0
         else:
-            return True
+            return None
 
-    triple_vowels_result = triple_vowels.search(text)
-    if triple_vowels_result:
-        logging.debug(
-            "Text {} contains triple vowel '{}'".format(
-                text, triple_vowels_result.group()
-            )
-        )
-        return False
-
-    # Match consonants not followed by vowels
-    double_consonants_result = double_consonants.search(text)
-    if double_consonants_result:
-        first, last = double_consonants_result.group()
-        logging.debug(
-            "The consonant '{}' is followed by '{}' instead of a vowel in text '{}'".format(
-                first, last, text
-            )
-        )
-        return False
-
-    ends_with_consonant_result = ends_with_consonant.search(text)
-    if ends_with_consonant_result:
-        last_letter = ends_with_consonant_result.group()[-1]
-        if last_letter in consonants:
-            # Last character in word is a consonant
-            logging.debug(
-                "The last character '{}' is a consonant: {}".format(last_letter, text)
-            )
-            return False
+    if failure:
+        return failure + (text, 0)
+    return None
 
-    pacific_island_result = pacific_island.search(text)
-    if pacific_island_result:
-        logging.debug(
-            "Contains a sequence {} that looks like it is from a Pacific Island language".format(
-                pacific_island_result.group()
-            )
-        )
-        return False
 
-    alphanum_result = alphanum.search(text)
-    if alphanum_result:
-        logging.debug(
-            "Contains numbers and letters together: {}".format(alphanum_result.group())
-        )
-        return False
+def rejection_message(text, rule, start, end):
+    """
+    Describe why a token broke a rule, given the span of text where it was broken.
+    """
 
-    return True
+    encoded = get_encoder("base").encode(text)
+    match = get_encoder("base").encode(text[start:end])
+    if rule == Rule.NON_MAORI_LETTER:
+        return "Letter '{}' not in maori character set".format(match)
+    elif rule == Rule.NON_MAORI_WORD:
+        return "Text {} is in non_maori word list".format(encoded)
+    elif rule == Rule.AMBIGUOUS_WORD:
+        return "Text {} is in ambiguous word list".format(encoded)
+    elif rule == Rule.SINGLE_CONSONANT:
+        return "Single character word {} is a consonant".format(encoded)
+    elif rule == Rule.TRIPLE_VOWEL:
+        return "Text {} contains triple vowel '{}'".format(encoded, match)
+    elif rule == Rule.DOUBLE_CONSONANT:
+        first, last = match
+        return "The consonant '{}' is followed by '{}' instead of a vowel in text '{}'".format(
+            first, last, encoded
+        )
+    elif rule == Rule.ENDS_WITH_CONSONANT:
+        return "The last character '{}' is a consonant: {}".format(match, encoded)
+    elif rule == Rule.PACIFIC_ISLAND:
+        return "Contains a sequence {} that looks like it is from a Pacific Island language".format(
+            match
+        )
+    elif rule == Rule.ALPHANUM:
+        return "Contains numbers and letters together: {}".format(match)
+    elif rule == Rule.EMPTY_SPLIT:
+        return "Text {} gives an empty string when split".format(text)
@@ -0,0 +1,495 @@
+"""
+A local server that classifies and encodes text for other processes, so that
+they can share one copy of the wordlists and encoders instead of each importing
+and building their own.
+
+    python -m reo_toolkit.serve --port 8765
+    python -m reo_toolkit.serve --unix /tmp/reo.sock --max-latency-ms 5
+
+Clients send one JSON request per line and get one JSON response per line back,
+in the same order, e.g.
+
+    {"id": 1, "op": "is_maori", "text": "kia ora", "strict": true}
+    {"id": 1, "result": true}
+
+The ops are is_maori (with text and optionally strict), convert_numbers (text),
+encode and decode (text and optionally encoder, which defaults to base), and
+metrics. A request that fails gets {"id": ..., "error": "..."} instead.
+
+Requests that arrive within max_latency of the first one waiting are handled
+together as a micro-batch in a worker thread: is_maori requests go through
+`is_maori_batch`, which classifies each distinct token once, and texts for the
+same encoder are encoded in one call. The metrics op reports the queue depth,
+batch sizes and the p50 and p99 latency of recent requests. `Client` is a small
+blocking client for the same protocol.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+from collections import deque
+
+from .encoders import encoder_classes, get_encoder, map_lines
+
+ops = ["is_maori", "convert_numbers", "encode", "decode"]
+
+
+def warm_up():
+    """Load the wordlists, encoders and lookup tables before the first request."""
+    from . import wordlists
+    from .encoders import hangul_tables
+    from .numbers import number_tables
+
+    for name in wordlists.wordlist_files:
+        getattr(wordlists, name)
+    for name in encoder_classes:
+        get_encoder(name)
+    hangul_tables()
+    number_tables()
+
+
+def group_key(request):
+    """
+    Check a request and give the key it is batched under, i.e. the op and the
+    options that have to be the same for every request in a group.
+    """
+    op = request.get("op")
+    assert op in ops, "Invalid op! Choose one of {} or 'metrics'".format(
+        ", ".join("'{}'".format(op) for op in ops)
+    )
+    assert isinstance(request.get("text"), str), "text must be a string"
+    if op == "is_maori":
+        strict = request.get("strict", True)
+        assert isinstance(strict, bool), "strict must be true or false"
+        return op, strict
+    if op in ["encode", "decode"]:
+        encoder = request.get("encoder", "base")
+        assert encoder in encoder_classes, "Invalid encoder! Choose one of {}".format(
+            ", ".join(encoder_classes)
+        )
+        return op, encoder
+    return op, None
+
+
+def run_group(key, texts):
+    """Handle the texts of a group of requests with the same key at once."""
+    from .reo_toolkit import is_maori_batch
+    from .numbers import convert_numbers
+
+    op, option = key
+    if op == "is_maori":
+        return is_maori_batch(texts, strict=option)
+    if op == "convert_numbers":
+        return [convert_numbers(text) for text in texts]
+
+    encoder = get_encoder(option)
+    coder = encoder.encode if op == "encode" else encoder.decode
+    if any("\n" in text for text in texts):
+        return [coder(text) for text in texts]
+    return map_lines(coder, texts)
+
+
+def error_message(error):
+    return "{}: {}".format(type(error).__name__, error)
+
+
+def handle_batch(requests):
+    """Give the response to each of a batch of requests, in the same order."""
+    responses = [None] * len(requests)
+    groups = {}
+    for i, request in enumerate(requests):
+        try:
+            key = group_key(request)
+        except AssertionError as e:
+            responses[i] = {"error": str(e)}
+            continue
+        groups.setdefault(key, []).append(i)
+
+    for key, indices in groups.items():
+        texts = [requests[i]["text"] for i in indices]
+        try:
+            results = run_group(key, texts)
+        except Exception:
+            # Find out which of the texts failed by handling them one at a time
+            results = []
+            for text in texts:
+                try:
+                    results.append(run_group(key, [text])[0])
+                except Exception as e:
+                    results.append(e)
+        for i, result in zip(indices, results):
+            if isinstance(result, Exception):
+                responses[i] = {"error": error_message(result)}
+            else:
+                responses[i] = {"result": result}
+
+    for request, response in zip(requests, responses):
+        if "id" in request:
+            response["id"] = request["id"]
+    return responses
+
+
+def percentile(values, q):
+    """The qth percentile of sorted values, by the nearest rank."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+
+class Batcher:
+    """
+    Collect requests into micro-batches and handle each batch in a worker thread.
+
+    Parameters:
+    max_latency (float): The longest a request waits in seconds for others to
+        join its batch. Defaults to 0.002.
+    max_batch (int): The most requests handled in one batch. Defaults to 256.
+    window (int): How many of the most recent latencies the percentiles are
+        taken over. Defaults to 10000.
+    """
+
+    def __init__(self, max_latency=0.002, max_batch=256, window=10000):
+        assert max_batch > 0, "max_batch must be positive"
+        self.max_latency = max_latency
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        # Set once enough requests are waiting to fill a batch
+        self.full = asyncio.Event()
+        self.latencies = deque(maxlen=window)
+        self.n_requests = 0
+        self.n_batches = 0
+
+    def submit(self, request):
+        """Queue a request, returning a future for its response."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((request, future, time.perf_counter()))
+        if self.queue.qsize() >= self.max_batch:
+            self.full.set()
+        return future
+
+    async def next_batch(self):
+        batch = [await self.queue.get()]
+        if self.queue.qsize() < self.max_batch - 1:
+            # Wait for more requests until the batch is full or the first one
+            # has waited long enough. Waiting on an event rather than the queue
+            # means a timeout can never lose a request.
+            try:
+                await asyncio.wait_for(self.full.wait(), self.max_latency)
+            except asyncio.TimeoutError:
+                pass
+        self.full.clear()
+        while len(batch) < self.max_batch and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.next_batch()
+            requests = [request for request, _, _ in batch]
+            try:
+                responses = await loop.run_in_executor(None, handle_batch, requests)
+            except Exception as e:
+                responses = [{"error": error_message(e)} for _ in batch]
+            now = time.perf_counter()
+            self.n_requests += len(batch)
+            self.n_batches += 1
+            for (_, future, start), response in zip(batch, responses):
+                self.latencies.append(now - start)
+                if not future.done():
+                    future.set_result(response)
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+
+        def to_ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 3)
+
+        return {
+            "queue_depth": self.queue.qsize(),
+            "requests": self.n_requests,
+            "batches": self.n_batches,
+            "mean_batch_size": (
+                round(self.n_requests / self.n_batches, 2) if self.n_batches else 0.0
+            ),
+            "p50_ms": to_ms(percentile(latencies, 50)),
+            "p99_ms": to_ms(percentile(latencies, 99)),
+        }
+
+
+class Server:
+    """
+    Serve requests on a TCP port, or on a unix socket if path is given.
+
+    Parameters:
+    host (str): The address to listen on. Defaults to 127.0.0.1.
+    port (int): The port to listen on, or 0 for any free port. Defaults to 8765.
+    path (str): A unix socket to listen on instead of a TCP port.
+    max_latency (float): Passed on to `Batcher`.
+    max_batch (int): Passed on to `Batcher`.
+    limit (int): The longest request line in bytes. Longer requests get an
+        error response. Defaults to 4MB.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=8765,
+        path=None,
+        max_latency=0.002,
+        max_batch=256,
+        limit=1 << 22,
+    ):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.max_latency = max_latency
+        self.max_batch = max_batch
+        self.limit = limit
+        self.server = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, warm_up)
+        self.batcher = Batcher(self.max_latency, self.max_batch)
+        self.batcher_task = asyncio.create_task(self.batcher.run())
+        if self.path is not None:
+            self.server = await asyncio.start_unix_server(
+                self.handle, self.path, limit=self.limit
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self.handle, self.host, self.port, limit=self.limit
+            )
+            # Find out which port was picked when port is 0
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.batcher_task.cancel()
+
+    async def handle(self, reader, writer):
+        # Responses are written in the order their requests were read, while the
+        # requests themselves are batched together with everyone else's
+        pending = asyncio.Queue()
+
+        async def write_responses():
+            while True:
+                response = await pending.get()
+                if response is None:
+                    break
+                if isinstance(response, asyncio.Future):
+                    response = await response
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+                writer.write(b"\n")
+                await writer.drain()
+
+        writer_task = asyncio.create_task(write_responses())
+        try:
+            async for line in read_lines(reader):
+                if line is None:
+                    pending.put_nowait(
+                        {
+                            "error": "Request is longer than the limit of {} bytes".format(
+                                self.limit
+                            )
+                        }
+                    )
+                    continue
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    assert isinstance(request, dict), "A request must be a JSON object"
+                except (ValueError, AssertionError) as e:
+                    pending.put_nowait({"error": error_message(e)})
+                    continue
+                if request.get("op") == "metrics":
+                    response = {"result": self.batcher.metrics()}
+                    if "id" in request:
+                        response["id"] = request["id"]
+                    pending.put_nowait(response)
+                else:
+                    pending.put_nowait(self.batcher.submit(request))
+            pending.put_nowait(None)
+            await writer_task
+        except (ValueError, asyncio.LimitOverrunError) as e:
+            # The stream can't be read any further, so reply and hang up
+            pending.put_nowait({"error": error_message(e)})
+            pending.put_nowait(None)
+            await writer_task
+        except (ConnectionError, asyncio.CancelledError):
+            writer_task.cancel()
+        finally:
+            writer.close()
+
+
+async def read_lines(reader):
+    """
+    Yield each line from a StreamReader, or None in place of a line longer than
+    the reader's limit, whose bytes are skipped.
+    """
+    too_long = False
+    while True:
+        try:
+            line = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            # The stream ended without a newline
+            if too_long:
+                yield None
+            elif e.partial:
+                yield e.partial
+            return
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+            too_long = True
+            continue
+        if too_long:
+            # The end of the line that was too long
+            too_long = False
+            yield None
+        else:
+            yield line
+
+
+class Client:
+    """
+    A blocking client for the server, sending one request at a time.
+
+    Examples:
+    >>> with Client(port=8765) as client:
+    ...     client.is_maori("kia ora")
+    True
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, path=None, timeout=None):
+        if path is not None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(path)
+        else:
+            sock = socket.create_connection((host, port), timeout)
+        self.sock = sock
+        self.file = sock.makefile("rwb")
+        self.next_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def send(self, requests):
+        """
+        Send many request dicts at once and read their responses, which lets the
+        server batch them together.
+        """
+        for request in requests:
+            self.file.write(json.dumps(request, ensure_ascii=False).encode("utf-8"))
+            self.file.write(b"\n")
+        self.file.flush()
+        return [json.loads(self.file.readline()) for _ in requests]
+
+    def request(self, op, **params):
+        """Send one request and return its result, raising ValueError on an error."""
+        self.next_id += 1
+        (response,) = self.send([dict(params, id=self.next_id, op=op)])
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    def is_maori(self, text, strict=True):
+        return self.request("is_maori", text=text, strict=strict)
+
+    def convert_numbers(self, text):
+        return self.request("convert_numbers", text=text)
+
+    def encode(self, text, encoder="base"):
+        return self.request("encode", text=text, encoder=encoder)
+
+    def decode(self, text, encoder="base"):
+        return self.request("decode", text=text, encoder=encoder)
+
+    def metrics(self):
+        return self.request("metrics")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="reo-serve",
+        description="Serve is_maori, convert_numbers and the encoders to local clients.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on. Defaults to 127.0.0.1.",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="Port to listen on. Defaults to 8765."
+    )
+    parser.add_argument("--unix", help="Listen on this unix socket instead of a port.")
+    parser.add_argument(
+        "--max-latency-ms",
+        type=float,
+        default=2.0,
+        help="How long a request waits for others to batch with. Defaults to 2.",
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=256,
+        help="The most requests handled at once. Defaults to 256.",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=1 << 22,
+        help="The longest request in bytes. Defaults to 4MB.",
+    )
+    args = parser.parse_args(argv)
+
+    server = Server(
+        host=args.host,
+        port=args.port,
+        path=args.unix,
+        max_latency=args.max_latency_ms / 1000,
+        max_batch=args.max_batch,
+        limit=args.limit,
+    )
+
+    async def serve():
+        await server.start()
+        print(
+            "Listening on {}".format(
+                args.unix or "{}:{}".format(server.host, server.port)
+            ),
+            file=sys.stderr,
+        )
+        try:
+            await server.serve_forever()
+        finally:
+            if args.unix and os.path.exists(args.unix):
+                os.remove(args.unix)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+A word tokenizer for te reo Māori text that keeps track of where each token is.
+
+Words are runs of letters and digits, including macrons written as combining
+characters, and may be joined by hyphens or apostrophes, e.g.
+"tino-rangatiratanga" or "ko'u". Every other character that isn't whitespace is
+a token of its own. Unlike nltk's TreebankWordTokenizer, punctuation is always
+split off and English contractions are left whole, and the patterns are
+compiled once rather than on every call.
+
+Because tokens know their offsets, `map_words` can change each word in place
+and leave the spacing and punctuation around it exactly as it was.
+"""
+
+import re
+from collections import namedtuple
+
+Token = namedtuple("Token", ["text", "start", "end"])
+
+word = r"[\w\u0304]+(?:[-'’][\w\u0304]+)*"
+word_pattern = re.compile(word)
+token_pattern = re.compile(r"{}|\S".format(word))
+
+# Spaces to remove when joining tokens, before closing punctuation or after ‘
+detokenize_pattern = re.compile(r" +(?=[,.?!:;’])|(?<=‘) ")
+
+
+def tokenize(text):
+    """
+    Split text into words and punctuation.
+
+    Examples:
+    >>> tokenize("Kei te pēhea koe?")
+    ['Kei', 'te', 'pēhea', 'koe', '?']
+    """
+    return token_pattern.findall(text)
+
+
+def tokenize_with_offsets(text):
+    """
+    Like `tokenize`, but returns a Token(text, start, end) for each token, where
+    text[start:end] is the token.
+
+    Examples:
+    >>> tokenize_with_offsets("Kia ora!")
+    [Token(text='Kia', start=0, end=3), Token(text='ora', start=4, end=7), Token(text='!', start=7, end=8)]
+    """
+    return [Token(m.group(), m.start(), m.end()) for m in token_pattern.finditer(text)]
+
+
+def detokenize(tokens):
+    """
+    Join tokens with spaces, except before , . ? ! : ; and ’ or after ‘.
+
+    Examples:
+    >>> detokenize(["Kei", "te", "pēhea", "koe", "?"])
+    'Kei te pēhea koe?'
+    """
+    return detokenize_pattern.sub("", " ".join(tokens))
+
+
+def map_words(text, func):
+    """
+    Replace every word in text with func(word), leaving everything in between
+    the words as it was.
+
+    Examples:
+    >>> map_words("kia ora, e hoa", str.upper)
+    'KIA ORA, E HOA'
+    """
+    return word_pattern.sub(lambda m: func(m.group()), text)
@@ -1,4 +1,17 @@
 import re
+import sys
+import json
+import zlib
+import struct
+from array import array
+from functools import partial
+from contextlib import contextmanager
+
+
+def gil_enabled():
+    """Whether the GIL stops threads from running Python code in parallel."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
 
 
 def is_camel_case(s):
@@ -11,3 +24,184 @@ def camel_case_split(identifier):
     )
     for m in matches:
         yield m.group(0)
+
+
+def open_text(filepath, mode="r"):
+    """
+    Open a text file for reading or writing, where '-' means stdin or stdout and
+    files ending in .gz or .bz2 are (de)compressed on the fly.
+    """
+    if filepath == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    if filepath.endswith(".gz"):
+        import gzip
+
+        return gzip.open(filepath, mode + "t", encoding="utf-8")
+    if filepath.endswith(".bz2"):
+        import bz2
+
+        return bz2.open(filepath, mode + "t", encoding="utf-8")
+    return open(filepath, mode, encoding="utf-8")
+
+
+@contextmanager
+def text_file(filepath, mode="r"):
+    """
+    Use `open_text` in a with statement, closing the file at the end unless it is
+    stdin or stdout, and flushing stdout.
+    """
+    f = open_text(filepath, mode)
+    try:
+        yield f
+    finally:
+        if f is sys.stdout:
+            f.flush()
+        elif f is not sys.stdin:
+            f.close()
+
+
+def map_split(pattern, text, func, matches=False):
+    """
+    Replace every non-empty piece of text between the matches of pattern with
+    func(piece), or with matches=True replace every match with func(match)
+    instead. pattern must have one group around all of it, so that its split
+    keeps the matches.
+
+    Examples:
+    >>> map_split(re.compile("( +)"), "kia  ora", str.upper)
+    'KIA  ORA'
+    """
+    pieces = pattern.split(text)
+    # split puts the matches at the odd indices
+    if matches:
+        pieces[1::2] = map(func, pieces[1::2])
+    else:
+        pieces[::2] = [func(piece) if piece else piece for piece in pieces[::2]]
+    return "".join(pieces)
+
+
+# Every character that str.split splits on, and the same for bytes
+whitespace = tuple(
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004"
+    "\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000"
+)
+bytes_whitespace = tuple(bytes([i]) for i in range(256) if bytes([i]).isspace())
+
+
+def read_blocks(stream, blocksize=1 << 20):
+    """
+    Split a file object or iterable of strings into blocks of roughly blocksize
+    characters that end on whitespace, so that no word is split between two blocks.
+    Binary streams give blocks of bytes. Text without any whitespace is kept
+    together however long it gets.
+    """
+    if hasattr(stream, "read"):
+        # read(0) gives "" or b"", whichever the stream returns at the end
+        stream = iter(partial(stream.read, blocksize), stream.read(0))
+    pieces = []
+    size = 0
+    for text in stream:
+        pieces.append(text)
+        size += len(text)
+        if size < blocksize:
+            continue
+        buffer = text[:0].join(pieces)
+        spaces = whitespace if isinstance(buffer, str) else bytes_whitespace
+        last_space = max(buffer.rfind(space) for space in spaces)
+        if last_space < 0:
+            pieces = [buffer]
+            continue
+        yield buffer[: last_space + 1]
+        pieces = [buffer[last_space + 1 :]]
+        size = len(pieces[0])
+    if size:
+        yield pieces[0][:0].join(pieces)
+
+
+def pack_strings(strings):
+    """Encode strings as UTF-8 into one blob, with an array of n + 1 offsets."""
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def make_index(blobs):
+    """
+    Build an open addressing hash table from blobs to their positions, keyed on
+    crc32 so that it is the same in every process. Slots hold position + 1, with
+    0 for an empty slot.
+    """
+    size = 1
+    while size < 2 * len(blobs):
+        size *= 2
+    index = array("I", [0]) * size
+    mask = size - 1
+    for position, blob in enumerate(blobs):
+        slot = zlib.crc32(blob) & mask
+        while index[slot]:
+            slot = (slot + 1) & mask
+        index[slot] = position + 1
+    return index
+
+
+def probe(index, offsets, blob_buffer, blob):
+    """
+    Look blob up in a hash table from `make_index`, where the blob at each
+    position is blob_buffer[offsets[position] : offsets[position + 1]].
+
+    Returns the position of blob, or None if it isn't in the table.
+    """
+    mask = len(index) - 1
+    slot = zlib.crc32(blob) & mask
+    while True:
+        position = index[slot]
+        if not position:
+            return None
+        if blob_buffer[offsets[position - 1] : offsets[position]] == blob:
+            return position - 1
+        slot = (slot + 1) & mask
+
+
+def pack_sections(magic, version, sections, header):
+    """
+    Lay out named sections of bytes one after another, each aligned to 8 bytes,
+    after the 8 byte magic string, the version, where the sections start and a
+    json header. The header gets a "sections" entry saying where each one starts
+    relative to the end of the header, and how long it is.
+
+    Returns the packed bytes, where the sections start, and the header.
+    """
+    layout = {}
+    position = 0
+    for name, data in sections:
+        layout[name] = [position, len(data)]
+        position += len(data) + -len(data) % 8
+    header = dict(header, sections=layout)
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * (-len(header_bytes) % 8)
+    start = 16 + len(header_bytes)
+
+    buffer = bytearray(magic + struct.pack("<II", version, start))
+    buffer += header_bytes
+    for name, data in sections:
+        buffer += data
+        buffer += bytes(-len(data) % 8)
+    return bytes(buffer), start, header
+
+
+def unpack_header(buffer, magic, version, filepath, kind):
+    """
+    Check the start of a buffer made by `pack_sections` for a kind of file, e.g.
+    "vocabulary", and read its header.
+
+    Returns where the sections start, and the header.
+    """
+    found, found_version, start = struct.unpack_from("<8sII", buffer)
+    assert found == magic, "{} is not a {} file".format(filepath, kind)
+    assert found_version == version, "Unsupported {} version {}".format(
+        kind, found_version
+    )
+    return start, json.loads(bytes(buffer[16:start]))
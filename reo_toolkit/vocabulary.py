@@ -0,0 +1,220 @@
+"""
+A compact index of the distinct tokens in a corpus, with their verdicts and
+encodings worked out once up front.
+
+Tokens are split from text the same way as `is_maori` splits them, and each is
+given an integer ID. The index is a handful of flat arrays (offsets into a blob
+of UTF-8 tokens, a hash table from tokens to IDs, a byte of flags per token and
+offsets into a blob for each encoding), so it can be saved as a single binary
+file and memory mapped, letting any number of worker processes share one copy.
+The arrays are stored in the machine's native byte order.
+
+    vocabulary = Vocabulary.build(open("corpus.txt"), encoders=["long_syllable"])
+    vocabulary.save("corpus.vocab")
+    vocabulary = Vocabulary.load("corpus.vocab")
+    vocabulary.is_maori("kia ora")
+"""
+
+import mmap
+from array import array
+
+from .reo_toolkit import splitter, is_maori_token
+from .encoders import get_encoder
+from .utils import (
+    pack_strings,
+    make_index,
+    probe,
+    pack_sections,
+    unpack_header,
+    map_split,
+)
+
+# Bits set in each token's flags
+STRICT = 1
+NON_STRICT = 2
+
+
+class Vocabulary:
+    """
+    Interned tokens with their `is_maori` verdicts and encodings.
+
+    Build one from a corpus with `Vocabulary.build`, or load a saved one with
+    `Vocabulary.load`. Token IDs run from 0 to len(vocabulary) - 1.
+
+    Examples:
+    >>> vocabulary = Vocabulary.build(["kia ora", "hello world"], encoders=["base"])
+    >>> vocabulary.is_maori("ora kia")
+    True
+    >>> vocabulary.encode("kia ora whānau", "base")
+    'kia ora ƒānau'
+    """
+
+    magic = b"REOVOCAB"
+    version = 1
+
+    def __init__(self, buffer, start, header, mapped=None):
+        self.buffer = buffer
+        self.mapped = mapped
+        self.encoders = header["encoders"]
+        self.views = [memoryview(buffer)]
+
+        def section(name, typecode=None):
+            offset, length = header["sections"][name]
+            data = self.views[0][start + offset : start + offset + length]
+            if typecode:
+                data = data.cast(typecode)
+            self.views.append(data)
+            return data
+
+        self.token_offsets = section("token_offsets", "Q")
+        self.tokens = section("tokens")
+        self.index = section("index", "I")
+        self.flags = section("flags", "B")
+        self.encodings = {
+            name: (section(name + "_offsets", "Q"), section(name))
+            for name in self.encoders
+        }
+
+    @classmethod
+    def build(cls, texts, encoders=()):
+        """
+        Index every token in an iterable of texts, e.g. the lines of a corpus.
+
+        Parameters:
+        texts (iterable of str): The texts to take tokens from.
+        encoders (iterable of str): Names of encoders, as passed to `get_encoder`,
+            to store the encoding of each token for.
+
+        Returns:
+        Vocabulary: The index, held in memory until it is saved.
+        """
+        vocab = set()
+        for text in texts:
+            vocab.update(splitter.split(text.strip()))
+        vocab.discard("")
+        tokens = sorted(vocab)
+
+        flags = array("B", bytes(len(tokens)))
+        for token_id, token in enumerate(tokens):
+            if is_maori_token(token, strict=True, cache=False):
+                flags[token_id] |= STRICT
+            if is_maori_token(token, strict=False, cache=False):
+                flags[token_id] |= NON_STRICT
+
+        token_offsets, token_blob = pack_strings(tokens)
+        blobs = [token.encode("utf-8") for token in tokens]
+        sections = [
+            ("token_offsets", token_offsets.tobytes()),
+            ("tokens", token_blob),
+            ("index", make_index(blobs).tobytes()),
+            ("flags", flags.tobytes()),
+        ]
+        encoders = list(encoders)
+        for name in encoders:
+            encode = get_encoder(name).encode
+            offsets, blob = pack_strings(encode(token) for token in tokens)
+            sections += [(name + "_offsets", offsets.tobytes()), (name, blob)]
+        return cls(*cls.pack(sections, encoders))
+
+    @classmethod
+    def pack(cls, sections, encoders):
+        """
+        Lay the sections out after a header, with `pack_sections`.
+
+        Returns the packed bytes, where the sections start, and the header.
+        """
+        return pack_sections(cls.magic, cls.version, sections, {"encoders": encoders})
+
+    def save(self, filepath):
+        with open(filepath, "wb") as f:
+            f.write(self.buffer)
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Memory map a saved vocabulary. Pages are only read as they are used, and
+        are shared between every process that loads the same file.
+        """
+        with open(filepath, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start, header = unpack_header(
+            mapped, cls.magic, cls.version, filepath, "vocabulary"
+        )
+        return cls(mapped, start, header, mapped=mapped)
+
+    def close(self):
+        """Release the memory map of a loaded vocabulary."""
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+    def __len__(self):
+        return len(self.flags)
+
+    def __contains__(self, token):
+        return self.lookup(token) is not None
+
+    def __getitem__(self, token_id):
+        """The token with an ID."""
+        offsets = self.token_offsets
+        return str(self.tokens[offsets[token_id] : offsets[token_id + 1]], "utf-8")
+
+    def lookup(self, token):
+        """The ID of a token, or None if it isn't in the vocabulary."""
+        return probe(self.index, self.token_offsets, self.tokens, token.encode("utf-8"))
+
+    def ids(self, text):
+        """The ID of each token in text, as split by `is_maori`, or None if unknown."""
+        return [self.lookup(token) for token in splitter.split(text.strip()) if token]
+
+    def verdict(self, token_id, strict=True):
+        """The `is_maori` verdict for the token with an ID."""
+        return bool(self.flags[token_id] & (STRICT if strict else NON_STRICT))
+
+    def is_maori(self, text, strict=True):
+        """
+        Gives the same verdict as `is_maori`, from the stored verdicts. Tokens that
+        aren't in the vocabulary are classified as usual.
+        """
+        flag = STRICT if strict else NON_STRICT
+        splits = splitter.split(text.strip())
+        for split in splits:
+            if len(split) == 0 and len(splits) > 1:
+                return False
+            token_id = self.lookup(split)
+            if token_id is None:
+                verdict = is_maori_token(split, strict=strict)
+            else:
+                verdict = self.flags[token_id] & flag
+            if not verdict:
+                return False
+        return True
+
+    def encoding(self, token_id, name):
+        """The stored encoding of the token with an ID."""
+        offsets, blob = self.encodings[name]
+        return str(blob[offsets[token_id] : offsets[token_id + 1]], "utf-8")
+
+    def encode(self, text, name):
+        """
+        Encode text with the named encoder, using the stored encoding of each
+        token and encoding unknown tokens as usual. The text is split up at the
+        encoder's separators, so the result is the same as encoding all of it.
+        Encoders that weren't stored when the vocabulary was built, or that don't
+        give their separators, encode the whole text.
+        """
+        encoder = get_encoder(name)
+        pattern = getattr(encoder, "separators", None)
+        if pattern is None or name not in self.encodings:
+            return encoder.encode(text)
+
+        def encode_token(token):
+            token_id = self.lookup(token)
+            if token_id is None:
+                return encoder.encode(token)
+            return self.encoding(token_id, name)
+
+        return map_split(pattern, text, encode_token)
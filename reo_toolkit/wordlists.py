@@ -1,22 +1,379 @@
 import os
+import re
+import sys
+import glob
+import mmap
+import time
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import Counter, namedtuple
+from operator import itemgetter
+import ahocorasick
 from ahocorasick import Automaton
 
-from .encoders import Base
+from .encoders import get_encoder
+from .utils import (
+    read_blocks,
+    pack_strings,
+    make_index,
+    probe,
+    pack_sections,
+    unpack_header,
+)
+
+Match = namedtuple("Match", ["start", "end", "term", "wordlist"])
+
+# Characters that separate words when scanning text for wordlist terms
+non_word = re.compile(r"[^\w'\u0304]")
+
+# Bump this whenever make_wordlist changes, so that cached automata are rebuilt
+cache_version = b"1"
 
 
 def make_wordlist(filepath):
     with open(filepath, "r") as f:
-        wordlist = Automaton()
-        for idx, word in enumerate(set(Base().encode(t) for t in f.read().split())):
-            wordlist.add_word(word.lower(), (idx, word))
-            wordlist.make_automaton()
+        words = sorted(set(get_encoder("base").encode(t) for t in f.read().split()))
+    wordlist = Automaton()
+    for idx, word in enumerate(words):
+        wordlist.add_word(word.lower(), (idx, word))
+    wordlist.make_automaton()
     return wordlist
 
 
-ambiguous = make_wordlist(
-    os.path.join(os.path.dirname(__file__), "ambiguous_terms.txt")
-)
-non_maori = make_wordlist(
-    os.path.join(os.path.dirname(__file__), "non_maori_terms.txt")
-)
-stop_words = make_wordlist(os.path.join(os.path.dirname(__file__), "stop_words.txt"))
+def automaton_version():
+    """
+    Identify the Python and pyahocorasick that automata are pickled with, as a
+    pickle from one build may not load in another. pyahocorasick doesn't give
+    its version, so the size and modification time of its extension module
+    stand in for it.
+    """
+    version = getattr(ahocorasick, "__version__", None)
+    if version is None:
+        try:
+            stat = os.stat(ahocorasick.__file__)
+            version = "{} {}".format(stat.st_size, stat.st_mtime_ns)
+        except (OSError, TypeError, AttributeError):
+            version = "unknown"
+    return "{}\n{}\n".format(sys.version, version).encode("utf-8")
+
+
+def load_wordlist(filepath):
+    """
+    Load the wordlist for a text file, building it with `make_wordlist` only if
+    the text has changed since it was last built.
+
+    Built automata are pickled next to the text file, named after a hash of the
+    versions of Python and pyahocorasick and a hash of its contents, e.g.
+    ambiguous_terms.<build>.<contents>.pickle. Each build keeps a pickle of its
+    own, so interpreters sharing a checkout don't rebuild each other's, and
+    pickles of old contents are removed. If that directory is read-only the
+    wordlist is simply built every time, as it is when the pickle can't be
+    loaded.
+    """
+    start = time.perf_counter()
+    with open(filepath, "rb") as f:
+        digest = hashlib.sha1(cache_version + f.read()).hexdigest()[:16]
+    build = hashlib.sha1(automaton_version()).hexdigest()[:8]
+    stem = os.path.splitext(filepath)[0]
+    cachepath = "{}.{}.{}.pickle".format(stem, build, digest)
+
+    try:
+        with open(cachepath, "rb") as f:
+            wordlist = pickle.load(f)
+        logging.debug(
+            "Loaded {} in {:.4f}s".format(cachepath, time.perf_counter() - start)
+        )
+        return wordlist
+    except OSError:
+        pass
+    except Exception as e:
+        # Anything can go wrong unpickling a corrupt or incompatible file
+        logging.debug("Could not load {}: {!r}".format(cachepath, e))
+
+    wordlist = make_wordlist(filepath)
+    try:
+        temppath = "{}.{}".format(cachepath, os.getpid())
+        with open(temppath, "wb") as f:
+            pickle.dump(wordlist, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temppath, cachepath)
+        # Remove pickles of other contents, whatever build made them
+        for stale in glob.glob("{}.*.pickle".format(glob.escape(stem))):
+            if not stale.endswith(".{}.pickle".format(digest)):
+                os.remove(stale)
+    except OSError:
+        logging.debug("Could not cache wordlist at {}".format(cachepath))
+    logging.debug("Built {} in {:.4f}s".format(filepath, time.perf_counter() - start))
+    return wordlist
+
+
+# Held while a wordlist or the scanner is loaded, so that threads asking for the
+# same one at once wait for it instead of building it twice. The scanner loads
+# the wordlists while holding it, so it is re-entrant
+load_lock = threading.RLock()
+
+wordlist_files = {
+    "ambiguous": "ambiguous_terms.txt",
+    "non_maori": "non_maori_terms.txt",
+    "stop_words": "stop_words.txt",
+}
+
+
+def make_scanner():
+    """
+    Combine every wordlist into one automaton for finding terms in running text.
+
+    Each term is stored as it is written (with ng and wh rather than ŋ and ƒ),
+    padded by a space either side so that only whole words match.
+    """
+    terms = {}
+    for name in wordlist_files:
+        for key in __getattr__(name).keys():
+            term = key.replace("ŋ", "ng").replace("ƒ", "wh")
+            terms.setdefault(term, []).append(name)
+    automaton = Automaton()
+    for term, names in terms.items():
+        automaton.add_word(" {} ".format(term), (term, tuple(names)))
+    automaton.make_automaton()
+    return automaton
+
+
+def pad_words(text):
+    """
+    Lowercase text and replace every character between words with a space, keeping
+    the offset of every word the same, then add a space at either end.
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # A few characters get longer when lowercased, which would shift offsets
+        lowered = "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+    return " {} ".format(non_word.sub(" ", lowered))
+
+
+def scan(text, offset=0):
+    """
+    Find every whole word in text that is in the ambiguous, non_maori or
+    stop_words wordlists, ignoring case, in a single pass over the text.
+
+    Yields a Match(start, end, term, wordlist) for each occurrence of a term in
+    each wordlist it belongs to, where text[start:end] is the matched word.
+    Offsets are shifted by offset, for when text is part of a larger document.
+
+    Examples:
+    >>> list(scan("Ko te reo"))
+    [Match(start=3, end=5, term='te', wordlist='stop_words')]
+    """
+    # Only take the load lock the first time, before the scanner is built
+    scanner = globals().get("scanner") or __getattr__("scanner")
+    for end, (term, names) in scanner.iter(pad_words(text)):
+        # end is the index of the trailing space in padded, which is one ahead of text
+        start = offset + end - len(term) - 1
+        for name in names:
+            yield Match(start, start + len(term), term, name)
+
+
+def scan_stream(stream, blocksize=1 << 20):
+    """
+    Like `scan`, but for a whole file object or iterable of strings, read a block
+    at a time. Offsets count characters from the start of the stream.
+    """
+    offset = 0
+    for block in read_blocks(stream, blocksize):
+        yield from scan(block, offset=offset)
+        offset += len(block)
+
+
+def wordlist_density(stream, blocksize=1 << 20):
+    """
+    Measure the fraction of the words in a file object or iterable of strings that
+    are in each wordlist, e.g. to estimate how much of a corpus is stop words or
+    likely English. Words are split the same way as `scan` finds them, so
+    hyphens and punctuation separate words too.
+
+    Returns a dict with the number of words, under "tokens", and the density for
+    each wordlist.
+    """
+    scanner = globals().get("scanner") or __getattr__("scanner")
+    tokens = 0
+    term_counts = Counter()
+    for block in read_blocks(stream, blocksize):
+        padded = pad_words(block)
+        tokens += len(padded.split())
+        # Counting (term, names) values directly keeps the loop over matches in C
+        term_counts.update(map(itemgetter(1), scanner.iter(padded)))
+
+    counts = Counter()
+    for (term, names), count in term_counts.items():
+        for name in names:
+            counts[name] += count
+    density = {"tokens": tokens}
+    for name in wordlist_files:
+        density[name] = counts[name] / tokens if tokens else 0.0
+    return density
+
+
+class FrozenWordlist:
+    """
+    A read-only wordlist held in a buffer, such as a memory mapped file, as a
+    sorted table of UTF-8 terms with a crc32 hash index into it.
+
+    It answers `in` the same way as the automaton from `make_wordlist`, reading
+    straight from the buffer, so processes that map the same file share one
+    copy of it. Make one with `freeze` and `attach`.
+    """
+
+    def __init__(self, offsets, terms, index):
+        self.offsets = offsets
+        self.terms = terms
+        self.index = index
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        offsets = self.offsets
+        for i in range(len(self)):
+            yield str(self.terms[offsets[i] : offsets[i + 1]], "utf-8")
+
+    def keys(self):
+        return iter(self)
+
+    def __contains__(self, term):
+        if not isinstance(term, str):
+            return False
+        position = probe(self.index, self.offsets, self.terms, term.encode("utf-8"))
+        return position is not None
+
+
+frozen_magic = b"REOWORDS"
+frozen_version = 1
+
+
+def frozen_path(directory=None):
+    """
+    Where `freeze` writes the wordlists by default: next to the wordlist files,
+    or in directory, named after a hash of their contents.
+    """
+    package_dir = os.path.dirname(__file__)
+    digest = hashlib.sha1(cache_version)
+    for filename in wordlist_files.values():
+        with open(os.path.join(package_dir, filename), "rb") as f:
+            digest.update(f.read())
+    return os.path.join(
+        directory or package_dir, "wordlists.{}.frozen".format(digest.hexdigest()[:16])
+    )
+
+
+def write_frozen(filepath):
+    sections = []
+    for name in wordlist_files:
+        terms = sorted(set(__getattr__(name).keys()))
+        offsets, blob = pack_strings(terms)
+        index = make_index([term.encode("utf-8") for term in terms])
+        sections += [
+            (name + "_offsets", offsets.tobytes()),
+            (name, blob),
+            (name + "_index", index.tobytes()),
+        ]
+    buffer, _, _ = pack_sections(
+        frozen_magic, frozen_version, sections, {"wordlists": list(wordlist_files)}
+    )
+    temppath = "{}.{}".format(filepath, os.getpid())
+    with open(temppath, "wb") as f:
+        f.write(buffer)
+    os.replace(temppath, filepath)
+
+
+def freeze(filepath=None):
+    """
+    Write the ambiguous, non_maori and stop_words wordlists to one compact file
+    that any number of processes can memory map with `attach`.
+
+    By default the file is written next to the wordlist files, or to the temp
+    directory if that is read-only, and is only written if it doesn't exist yet.
+    The file is in the machine's native byte order.
+
+    Returns:
+    str: The path of the file.
+    """
+    if filepath is not None:
+        write_frozen(filepath)
+        return filepath
+
+    filepath = frozen_path()
+    if os.path.exists(filepath):
+        return filepath
+    try:
+        write_frozen(filepath)
+    except OSError:
+        filepath = frozen_path(tempfile.gettempdir())
+        if not os.path.exists(filepath):
+            write_frozen(filepath)
+        return filepath
+    pattern = os.path.join(os.path.dirname(filepath), "wordlists.*.frozen")
+    for stale in glob.glob(pattern):
+        if stale != filepath:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return filepath
+
+
+def attach(filepath=None):
+    """
+    Memory map wordlists written by `freeze` and use them in this process for
+    ambiguous, non_maori and stop_words, instead of loading their automata.
+
+    The pages of the file are shared by every process that maps it, so the
+    wordlists take up the same memory however many workers there are. Use it to
+    set up the workers of a process pool, freezing once in the parent:
+
+        Pool(64, initializer=wordlists.attach, initargs=(wordlists.freeze(),))
+
+    Parameters:
+    filepath (str): A file written by `freeze`. Defaults to freezing the
+        wordlists first, if they haven't been already.
+    """
+    if filepath is None:
+        filepath = freeze()
+    with open(filepath, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    start, header = unpack_header(
+        mapped, frozen_magic, frozen_version, filepath, "frozen wordlists"
+    )
+    # The map stays open for as long as the views into it are in use
+    view = memoryview(mapped)
+
+    def section(name, typecode=None):
+        offset, length = header["sections"][name]
+        data = view[start + offset : start + offset + length]
+        return data.cast(typecode) if typecode else data
+
+    with load_lock:
+        for name in header["wordlists"]:
+            globals()[name] = FrozenWordlist(
+                section(name + "_offsets", "Q"),
+                section(name),
+                section(name + "_index", "I"),
+            )
+
+
+def __getattr__(name):
+    # The wordlists are only loaded the first time they are used
+    if name != "scanner" and name not in wordlist_files:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    with load_lock:
+        # Another thread may have loaded it while this one waited for the lock
+        if name in globals():
+            return globals()[name]
+        if name == "scanner":
+            value = make_scanner()
+        else:
+            value = load_wordlist(
+                os.path.join(os.path.dirname(__file__), wordlist_files[name])
+            )
+        globals()[name] = value
+        return value
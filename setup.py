@@ -12,4 +12,11 @@ setup(
     author="Caleb Moses",
     author_email="caleb@dragonfly.co.nz",
     include_package_data=True,
+    entry_points={
+        "console_scripts": [
+            "reo-filter=reo_toolkit.filter:main",
+            "reo-pipeline=reo_toolkit.pipeline:main",
+            "reo-serve=reo_toolkit.serve:main",
+        ]
+    },
 )
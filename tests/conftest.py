@@ -0,0 +1,27 @@
+import pytest
+
+from reo_toolkit.utils import open_text
+
+
+@pytest.fixture
+def write_input(tmp_path):
+    """Write lines to a file in tmp_path, compressed if name ends in .gz or .bz2."""
+
+    def write(lines, name="corpus.txt"):
+        filepath = str(tmp_path / name)
+        with open_text(filepath, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return filepath
+
+    return write
+
+
+@pytest.fixture
+def read_output():
+    """Read the lines of a file, without newlines."""
+
+    def read(filepath):
+        with open(filepath, "r", encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    return read
@@ -0,0 +1,169 @@
+from reo_toolkit import is_maori
+from reo_toolkit.cache import TokenCache
+from reo_toolkit.reo_toolkit import token_cache
+
+
+def test_lru_eviction():
+    cache = TokenCache(maxsize=2, policy="lru")
+    cache.put("a", True)
+    cache.put("b", False)
+    cache.get("a")
+    cache.put("c", True)
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+def test_lfu_eviction():
+    cache = TokenCache(maxsize=2, policy="lfu")
+    cache.put("a", True)
+    cache.put("b", False)
+    cache.get("b")
+    cache.get("b")
+    cache.get("a")
+    cache.put("c", True)
+    assert "a" not in cache
+    assert "b" in cache
+    assert "c" in cache
+
+
+def test_statistics():
+    cache = TokenCache(maxsize=10)
+    assert cache.get("a") is None
+    cache.put("a", False)
+    assert cache.get("a") is False
+    assert cache.info() == (1, 1, 10, 1)
+    cache.clear()
+    assert cache.info() == (0, 0, 10, 0)
+
+
+def test_disabled():
+    cache = TokenCache(maxsize=0)
+    cache.put("a", True)
+    assert len(cache) == 0
+
+
+def test_is_maori_uses_cache():
+    token_cache.clear()
+    assert is_maori("ko te ra ko te ra", strict=False)
+    assert token_cache.info().misses == 3
+    assert token_cache.info().hits == 3
+    assert ("ra", False) in token_cache
+
+
+def test_persistent_cache(tmp_path):
+    from reo_toolkit.cache import PersistentCache
+    from reo_toolkit.encoders import get_encoder
+    from reo_toolkit.reo_toolkit import is_maori_batch
+
+    texts = ["kia ora", "hello world", "-maori", "", "tino-rangatiratanga", "a  b"]
+    filepath = str(tmp_path / "cache.sqlite")
+    for _ in range(2):
+        # The second time round everything comes from the file
+        with PersistentCache(filepath) as cache:
+            for strict in [True, False]:
+                assert cache.is_maori_batch(texts, strict=strict) == is_maori_batch(
+                    texts, strict=strict
+                )
+            for name in ["base", "long_syllable"]:
+                assert cache.encode_batch(texts, name) == [
+                    get_encoder(name).encode(text) for text in texts
+                ]
+    with PersistentCache(filepath) as cache:
+        assert cache.get_verdicts(["kia", "hello", "unseen"]) == {
+            "kia": True,
+            "hello": False,
+        }
+        assert cache.get_encodings(["whare"], "base") == {}
+
+
+def test_persistent_cache_encode_hyphenated(tmp_path):
+    from reo_toolkit.cache import PersistentCache
+    from reo_toolkit.encoders import encoder_classes, get_encoder
+
+    texts = [
+        "kia ora",
+        "kia-hello ora",
+        "ko te whare-hello-kia, ā-tōna wā",
+        "hello-whānau - ngā",
+    ]
+    with PersistentCache(str(tmp_path / "cache.sqlite")) as cache:
+        for name in encoder_classes:
+            for _ in range(2):
+                assert cache.encode_batch(texts, name) == [
+                    get_encoder(name).encode(text) for text in texts
+                ]
+
+
+def test_persistent_cache_batches(tmp_path):
+    from reo_toolkit.cache import PersistentCache
+
+    tokens = ["token{}".format(i) for i in range(1234)]
+    with PersistentCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.put_encodings({token: token.upper() for token in tokens}, "upper")
+        assert cache.get_encodings(tokens, "upper") == {
+            token: token.upper() for token in tokens
+        }
+
+
+def test_persistent_cache_invalidation(tmp_path):
+    from reo_toolkit.cache import PersistentCache
+
+    filepath = str(tmp_path / "cache.sqlite")
+    with PersistentCache(filepath, version="old") as cache:
+        cache.put_verdicts({"kia": True})
+        assert cache.get_verdicts(["kia"]) == {"kia": True}
+    with PersistentCache(filepath, version="new") as cache:
+        assert cache.get_verdicts(["kia"]) == {}
+    # Entries for other versions are gone for good
+    with PersistentCache(filepath, version="old") as cache:
+        assert cache.get_verdicts(["kia"]) == {}
+
+
+def test_rules_version(tmp_path):
+    import os
+    import shutil
+    import reo_toolkit
+    from reo_toolkit.cache import rules_files, rules_version
+
+    package_dir = os.path.dirname(reo_toolkit.__file__)
+    for filename in rules_files:
+        shutil.copy(os.path.join(package_dir, filename), str(tmp_path))
+    before = rules_version(str(tmp_path))
+    assert before == rules_version(package_dir)
+    with open(str(tmp_path / "ambiguous_terms.txt"), "a") as f:
+        f.write("\nhei\n")
+    rules_version.cache_clear()
+    assert rules_version(str(tmp_path)) != before
+
+
+def test_persistent_cache_concurrent(tmp_path):
+    import threading
+    from reo_toolkit.cache import PersistentCache
+
+    filepath = str(tmp_path / "cache.sqlite")
+    PersistentCache(filepath).close()
+    words = ["kupu{}".format(i) for i in range(200)]
+    errors = []
+
+    def write():
+        with PersistentCache(filepath) as cache:
+            for i in range(0, len(words), 20):
+                cache.put_verdicts({word: True for word in words[i : i + 20]})
+
+    def read():
+        with PersistentCache(filepath) as cache:
+            for _ in range(20):
+                found = cache.get_verdicts(words)
+                if not all(found.values()):
+                    errors.append(found)
+
+    threads = [threading.Thread(target=write)]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with PersistentCache(filepath) as cache:
+        assert len(cache.get_verdicts(words)) == len(words)
@@ -0,0 +1,137 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from reo_toolkit import wordlists
+from reo_toolkit.cache import TokenCache
+from reo_toolkit.encoders import encoder_classes, get_encoder
+from reo_toolkit.reo_toolkit import is_maori, explain_maori
+from reo_toolkit.utils import gil_enabled
+from reo_toolkit.concurrency import thread_map, map_is_maori, map_encode, map_decode
+
+
+def read_lines():
+    with open("data/he-whakaputanga.txt", "r") as f:
+        return [line for line in f.read().splitlines() if line.strip()]
+
+
+def run_threads(n_threads, target):
+    """Start target in n_threads threads at the same moment and re-raise any error."""
+    barrier = threading.Barrier(n_threads)
+    errors = []
+
+    def run():
+        barrier.wait()
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def test_thread_map():
+    words = ["kia", "ora"] * 5
+    assert thread_map(str.upper, words, n_threads=3, chunksize=2) == [
+        word.upper() for word in words
+    ]
+    assert thread_map(len, [], n_threads=2) == []
+    with ThreadPoolExecutor(2) as executor:
+        assert thread_map(len, ["kia", "ora"], executor=executor) == [3, 3]
+
+
+def test_map_helpers():
+    lines = read_lines()
+    assert map_is_maori(lines, n_threads=4, chunksize=3) == [
+        is_maori(line) for line in lines
+    ]
+    assert map_is_maori(lines, strict=False, n_threads=4, chunksize=3) == [
+        is_maori(line, strict=False) for line in lines
+    ]
+    for name in ["base", "double_vowel", "long_syllable"]:
+        encoded = map_encode(lines, name, n_threads=4, chunksize=3)
+        assert encoded == [get_encoder(name).encode(line) for line in lines]
+        assert map_decode(encoded, name, n_threads=4, chunksize=3) == [
+            get_encoder(name).decode(text) for text in encoded
+        ]
+
+
+def test_stress_shared_tables(monkeypatch):
+    # Every thread works through the same lines with the same encoders, automata
+    # and token cache, which is kept small so that it is evicting all the time
+    lines = read_lines()
+    names = list(encoder_classes)
+    expected = {
+        "is_maori": [is_maori(line) for line in lines],
+        "explain": [explain_maori(line, strict=False) for line in lines],
+        "scan": [list(wordlists.scan(line)) for line in lines],
+    }
+    for name in names:
+        expected[name] = [get_encoder(name).encode(line) for line in lines]
+
+    from reo_toolkit import reo_toolkit
+
+    monkeypatch.setattr(reo_toolkit, "token_cache", TokenCache(maxsize=16))
+    # Make the threads race to load the wordlists and build the scanner again
+    for name in ["ambiguous", "non_maori", "stop_words", "scanner"]:
+        monkeypatch.delitem(vars(wordlists), name, raising=False)
+
+    def work():
+        for _ in range(3):
+            assert [is_maori(line) for line in lines] == expected["is_maori"]
+            assert [explain_maori(line, strict=False) for line in lines] == expected[
+                "explain"
+            ]
+            assert [list(wordlists.scan(line)) for line in lines] == expected["scan"]
+            for name in names:
+                encode = get_encoder(name).encode
+                assert [encode(line) for line in lines] == expected[name]
+
+    run_threads(8, work)
+    assert len(reo_toolkit.token_cache) <= 16
+
+
+def test_stress_token_cache():
+    for policy in ["lru", "lfu"]:
+        cache = TokenCache(maxsize=32, policy=policy)
+
+        def work():
+            for i in range(5000):
+                key = (str(i % 100), True)
+                if cache.get(key) is None:
+                    cache.put(key, i % 2 == 0)
+
+        run_threads(8, work)
+        info = cache.info()
+        if cache.lock_free_get:
+            # Lock-free lookups may lose a count when threads race
+            assert 0 < info.hits + info.misses <= 8 * 5000
+        else:
+            assert info.hits + info.misses == 8 * 5000
+        assert info.currsize <= 32
+
+
+@pytest.mark.skipif(
+    gil_enabled() or (os.cpu_count() or 1) < 2,
+    reason="Threads only run in parallel on a free-threaded build with 2+ cores",
+)
+def test_throughput_scales_with_threads():
+    lines = read_lines() * 50
+    encode = get_encoder("long_syllable").encode
+
+    def timed(n_threads):
+        start = time.perf_counter()
+        thread_map(encode, lines, n_threads=n_threads, chunksize=100)
+        return time.perf_counter() - start
+
+    timed(2)
+    assert timed(2) < 0.8 * timed(1)
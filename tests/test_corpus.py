@@ -0,0 +1,56 @@
+from reo_toolkit.corpus import MappedCorpus
+
+lines = ["kia ora", "", "tēnā koutou katoa", "ā, ē, ī, ō, ū", "whakawhetai"]
+
+
+def write_corpus(tmp_path, text):
+    filepath = str(tmp_path / "corpus.txt")
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write(text)
+    return filepath
+
+
+def test_lines(tmp_path):
+    filepath = write_corpus(tmp_path, "\n".join(lines) + "\n")
+    with MappedCorpus(filepath) as corpus:
+        assert list(corpus) == lines
+        spans = list(corpus.spans())
+        assert spans[:2] == [(0, 7), (8, 8)]
+        assert corpus.line(spans[2]) == "tēnā koutou katoa"
+
+
+def test_no_trailing_newline(tmp_path):
+    filepath = write_corpus(tmp_path, "\n".join(lines))
+    with MappedCorpus(filepath) as corpus:
+        assert list(corpus) == lines
+
+
+def test_crlf(tmp_path):
+    filepath = str(tmp_path / "corpus.txt")
+    with open(filepath, "wb") as f:
+        f.write("\r\n".join(lines).encode("utf-8") + b"\r")
+    with MappedCorpus(filepath, blocksize=8) as corpus:
+        assert list(corpus) == lines
+        assert [corpus.line(span) for span in corpus.spans()] == lines
+
+
+def test_empty_file(tmp_path):
+    filepath = write_corpus(tmp_path, "")
+    with MappedCorpus(filepath) as corpus:
+        assert list(corpus) == []
+        assert corpus.partition(4) == []
+
+
+def test_partition(tmp_path):
+    text = "\n".join(lines * 10) + "\n"
+    filepath = write_corpus(tmp_path, text)
+    with MappedCorpus(filepath) as corpus:
+        for n_parts in [1, 2, 3, 7, 100]:
+            ranges = corpus.partition(n_parts)
+            assert len(ranges) <= n_parts
+            assert ranges[0][0] == 0 and ranges[-1][1] == len(text.encode("utf-8"))
+            read = []
+            for start, end in ranges:
+                with MappedCorpus(filepath, start, end) as part:
+                    read += list(part)
+            assert read == lines * 10
@@ -85,6 +85,14 @@ def test_syllable_decode():
     assert Syllable().decode("케어 테 폐헤아 코에?") == "kei te pēhea koe?"
 
 
+def test_syllable_tables():
+    syllable_table, hangul_table = hangul_tables()
+    assert len(syllable_table) == len(hangul_table) == 110
+    assert syllable_table["ƒa"] == "자"
+    for syllable, hangul in syllable_table.items():
+        assert Syllable().decode(hangul) == get_encoder("base").decode(syllable)
+
+
 def test_syllable_alphanum():
     sent = "i18n me l10n i roto i te reo ipurangi"
     assert Syllable().decode(Syllable().encode(sent)) == sent
@@ -104,3 +112,90 @@ def test_long_syllable_encode():
 
 def test_long_syllable_decode():
     assert LongSyllable().decode("ʁʄ Ȯ ʎ ʙ") == "whiti mai te ra"
+
+
+def test_longest_match():
+    encoder = LongestMatch({"a": "1", "ae": "2", "aei": "3", "i": "4"})
+    assert encoder.replace("aeiaeai") == "3214"
+
+
+def test_double_vowel_longest_match():
+    # The leftmost vowel pair is taken first
+    assert DoubleVowel().encode("aea") == "Ʈƚ"
+    assert DoubleVowel().decode("Ʈƚ") == "aea"
+
+
+def test_get_encoder_is_shared():
+    assert get_encoder("long_syllable") is get_encoder("long_syllable")
+    assert get_encoder("syllable", vowel_type="short").vowel_type == "short"
+    assert get_encoder("syllable") is not get_encoder("syllable", vowel_type="short")
+
+
+def test_json_map_loaded_once():
+    assert DoubleVowel().encoder_dict is DoubleVowel().encoder_dict
+
+
+def test_get_encoder_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(8) as executor:
+        instances = set(
+            map(id, executor.map(lambda _: get_encoder("diphthong"), range(100)))
+        )
+    assert len(instances) == 1
+
+
+def test_register_encoder():
+    class Upper:
+        def encode(self, text):
+            return text.upper()
+
+    from reo_toolkit.encoders import encoder_classes, encoders
+
+    try:
+        register_encoder("upper", Upper)
+        assert get_encoder("upper").encode("kia ora") == "KIA ORA"
+    finally:
+        # Leave the registry as it was for the other tests
+        del encoder_classes["upper"]
+        encoders.pop("upper", None)
+
+
+def test_read_blocks():
+    from io import BytesIO, StringIO
+    from reo_toolkit.utils import read_blocks
+
+    text = "kia\tora\u3000koutou\r\nwhānau " * 10
+    blocks = list(read_blocks(StringIO(text), blocksize=8))
+    assert "".join(blocks) == text
+    assert all(block[-1].isspace() for block in blocks)
+    assert max(map(len, blocks)) < 16
+
+    data = text.encode("utf-8")
+    blocks = list(read_blocks(BytesIO(data), blocksize=8))
+    assert b"".join(blocks) == data
+    assert all(block[-1:].isspace() for block in blocks[:-1])
+
+    # A word longer than blocksize is never split
+    assert list(read_blocks(["whaka", "papa", "tanga"], blocksize=4)) == [
+        "whakapapatanga"
+    ]
+
+
+def test_encode_stream():
+    from io import StringIO
+
+    text = "Whiti mai te rangi\nkua whānau ngā tamariki, aue!\n" * 20
+    for name in [
+        "base",
+        "single_vowel",
+        "diphthong",
+        "syllable",
+        "double_vowel",
+        "long_syllable",
+    ]:
+        encoder = get_encoder(name)
+        encoded = "".join(encoder.encode_stream(StringIO(text), blocksize=16))
+        assert encoded == encoder.encode(text)
+        decoded = "".join(encoder.decode_stream([encoded[:5], encoded[5:]], 16))
+        assert decoded == encoder.decode(encoded)
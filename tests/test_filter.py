@@ -0,0 +1,31 @@
+import json
+
+from reo_toolkit.filter import main
+
+lines = ["kia ora", "hello world", "ko te rata te next one", "tēnā koe"]
+
+
+def test_kept(tmp_path, write_input, read_output):
+    outfile = str(tmp_path / "kept.txt")
+    infile = write_input(lines, "corpus.txt.gz")
+    main([infile, "-o", outfile, "-q"])
+    assert read_output(outfile) == ["kia ora", "tēnā koe"]
+
+
+def test_rejected(tmp_path, write_input, read_output):
+    outfile = str(tmp_path / "rejected.txt")
+    infile = write_input(lines, "corpus.txt.gz")
+    main([infile, "-o", outfile, "--output", "rejected", "-q"])
+    assert read_output(outfile) == ["hello world", "ko te rata te next one"]
+
+
+def test_jsonl_in_order_across_jobs(tmp_path, write_input, read_output):
+    outfile = str(tmp_path / "labelled.jsonl")
+    infile = write_input(lines, "corpus.txt.gz")
+    main(
+        [infile, infile, "-o", outfile, "--output", "jsonl"]
+        + ["--jobs", "2", "--chunksize", "1", "-q"]
+    )
+    records = [json.loads(line) for line in read_output(outfile)]
+    assert [record["text"] for record in records] == lines + lines
+    assert [record["is_maori"] for record in records] == [True, False, False, True] * 2
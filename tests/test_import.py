@@ -0,0 +1,45 @@
+import sys
+import json
+import subprocess
+
+# Generous enough for a slow CI machine, but well below the ~0.3s it took when
+# nltk and the wordlists were loaded eagerly
+import_time_budget = 0.1
+
+script = """
+import sys, json, time
+start = time.perf_counter()
+import reo_toolkit
+elapsed = time.perf_counter() - start
+from reo_toolkit.numbers import digits_to_text
+digits_to_text(42)
+heavy = [name for name in ["nltk", "jamo", "reo_toolkit.wordlists"] if name in sys.modules]
+print(json.dumps({"elapsed": elapsed, "heavy": heavy}))
+"""
+
+
+def test_import_time():
+    output = subprocess.check_output([sys.executable, "-c", script])
+    result = json.loads(output)
+    assert result["heavy"] == []
+    assert result["elapsed"] < import_time_budget
+
+
+def test_lazy_attributes():
+    import reo_toolkit
+
+    assert reo_toolkit.is_maori("kia ora")
+    assert "toŋue" in reo_toolkit.wordlists.non_maori
+    assert "a" in reo_toolkit.ambiguous
+    assert reo_toolkit.encoders.get_encoder("base").encode("whānau") == "ƒānau"
+
+
+def test_star_import():
+    namespace = {}
+    exec("from reo_toolkit import *", namespace)
+    names = set(namespace) - {"__builtins__"}
+    assert {"is_maori", "ambiguous", "vowels", "consonants"} <= names
+    assert {"encoders", "numbers"} <= names
+    assert not names & {"importlib", "lazy_attributes", "submodules"}
+    assert namespace["is_maori"]("kia ora")
+    assert namespace["encoders"].get_encoder("base").encode("whānau") == "ƒānau"
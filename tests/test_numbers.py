@@ -1,4 +1,8 @@
-from reo_toolkit.numbers import convert_numbers, digits_to_text
+import warnings
+
+import pytest
+
+from reo_toolkit.numbers import convert_numbers, digits_to_text, digits_to_text_many
 
 
 def test_digits_to_text():
@@ -16,3 +20,39 @@ def test_convert_pounds():
         convert_numbers("£54321")
         == "rima tekau mā whā mano toru rau rua tekau mā tahi pāuna"
     )
+
+
+def test_thousands():
+    assert digits_to_text(1100) == "kotahi mano rau"
+    assert digits_to_text(111111) == "kotahi rau tekau kotahi mano rau tekau mā tahi"
+
+
+def test_convert_range_and_percent():
+    assert convert_numbers("1-2 10%") == "tahi ki te rua tekau paihēneti"
+
+
+def test_lone_dollar_sign():
+    assert convert_numbers("$ 5") == "$ rima"
+
+
+def test_digits_to_text_many():
+    values = [0, 7, 10101, 999999]
+    assert digits_to_text_many(values) == [digits_to_text(num) for num in values]
+
+
+def test_digits_to_text_many_errors():
+    assert digits_to_text_many([1, 1000000], errors="mask") == ["tahi", None]
+    with pytest.raises(ValueError):
+        digits_to_text_many([1, -1], errors="raise")
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert digits_to_text_many([1000000, 2000000]) == ["1000000", "2000000"]
+    assert len(caught) == 1
+
+
+def test_digits_to_text_many_array():
+    np = pytest.importorskip("numpy")
+    values = np.array([0, 7, 10101, 999999, 1000000])
+    texts = digits_to_text_many(values, errors="mask")
+    assert list(texts[:4]) == [digits_to_text(num) for num in values[:4]]
+    assert texts[4] is None
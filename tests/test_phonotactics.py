@@ -0,0 +1,41 @@
+from reo_toolkit.phonotactics import Rule, scan
+
+
+def test_valid_word():
+    assert scan("whakawhetai") == (9, None)
+
+
+def test_digraphs_count_as_one_letter():
+    assert scan("ngā")[0] == 2
+    assert scan("nGā") == (2, (Rule.NON_MAORI_LETTER, 1, 2))
+
+
+def test_non_maori_letter():
+    assert scan("hello")[1] == (Rule.NON_MAORI_LETTER, 2, 3)
+
+
+def test_triple_vowel():
+    assert scan("teee") == (4, (Rule.TRIPLE_VOWEL, 1, 4))
+
+
+def test_double_consonant():
+    assert scan("mmea") == (4, (Rule.DOUBLE_CONSONANT, 0, 2))
+    assert scan("hangka")[1] == (Rule.DOUBLE_CONSONANT, 2, 5)
+
+
+def test_ends_with_consonant():
+    assert scan("kawhak") == (5, (Rule.ENDS_WITH_CONSONANT, 5, 6))
+
+
+def test_priority():
+    # The double consonant comes first, but the triple vowel takes priority
+    assert scan("kkaaa")[1][0] == Rule.TRIPLE_VOWEL
+
+
+def test_pacific_island():
+    assert scan("ma'unga")[1] == (Rule.PACIFIC_ISLAND, 1, 4)
+
+
+def test_alphanum():
+    assert scan("i18n")[1] == (Rule.ALPHANUM, 0, 3)
+    assert scan("2009") == (4, None)
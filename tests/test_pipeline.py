@@ -0,0 +1,78 @@
+import os
+import json
+
+from reo_toolkit.encoders import get_encoder
+from reo_toolkit.pipeline import main, shard_offsets
+
+lines = ["kia ora", "hello world", "whiti mai te rangi", "tēnā koe", "e 3 ngā tamariki"]
+
+
+def test_shard_offsets(tmp_path, write_input):
+    filepath = write_input(lines * 20)
+    with open(filepath, "rb") as f:
+        data = f.read()
+    offsets = shard_offsets(filepath, 7)
+    assert len(offsets) == 7
+    assert offsets[0][0] == 0 and offsets[-1][1] == len(data)
+    for (start, end), (next_start, _) in zip(offsets, offsets[1:]):
+        assert end == next_start
+        assert data[next_start - 1 : next_start] == b"\n"
+
+
+def test_ordered_output(tmp_path, write_input, read_output):
+    infile = write_input(lines * 20)
+    outfile = str(tmp_path / "encoded.txt")
+    main([infile, "-o", outfile, "-e", "long_syllable", "-j", "2", "--shards", "5"])
+    encoder = get_encoder("long_syllable")
+    assert read_output(outfile) == [encoder.encode(line) for line in lines * 20]
+    with open(outfile + ".manifest.json") as f:
+        manifest = json.load(f)
+    assert manifest["lines"] == manifest["kept"] == 100
+    assert len(manifest["shards"]) == 5
+
+
+def test_sharded_output(tmp_path, write_input, read_output):
+    infile = write_input(lines * 20)
+    outdir = str(tmp_path / "encoded")
+    main([infile, "--outdir", outdir, "--filter", "--numbers", "--shards", "3", "-q"])
+    with open(os.path.join(outdir, "manifest.json")) as f:
+        manifest = json.load(f)
+    encoded = []
+    for shard in manifest["shards"]:
+        encoded += read_output(shard["output"])
+    assert (
+        encoded
+        == ["kia ora", "ƒiti mai te raŋi", "tēnā koe", "e toru ŋā tamariki"] * 20
+    )
+    assert manifest["kept"] == 80
+
+
+def test_crlf_input(tmp_path, read_output):
+    import gzip
+
+    data = "".join(line + "\r\n" for line in lines).encode("utf-8")
+    plain = str(tmp_path / "crlf.txt")
+    with open(plain, "wb") as f:
+        f.write(data)
+    compressed = str(tmp_path / "crlf.txt.gz")
+    with gzip.open(compressed, "wb") as f:
+        f.write(data)
+
+    expected = [get_encoder("base").encode(line) for line in lines]
+    for infile in [plain, compressed]:
+        outfile = str(tmp_path / "encoded.txt")
+        main([infile, "-o", outfile, "--shards", "2", "-q"])
+        with open(outfile, "rb") as f:
+            assert b"\r" not in f.read()
+        assert read_output(outfile) == expected
+
+        outdir = str(tmp_path / "parts")
+        main([infile, "--outdir", outdir, "--shards", "2", "-q"])
+        with open(os.path.join(outdir, "manifest.json")) as f:
+            manifest = json.load(f)
+        encoded = []
+        for shard in manifest["shards"]:
+            with open(shard["output"], "rb") as f:
+                assert b"\r" not in f.read()
+            encoded += read_output(shard["output"])
+        assert encoded == expected
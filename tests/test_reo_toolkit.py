@@ -1,4 +1,4 @@
-from reo_toolkit import is_maori
+from reo_toolkit import is_maori, is_maori_batch
 from reo_toolkit.wordlists import non_maori
 
 
@@ -115,3 +115,72 @@ def test_sentence():
         "inā tatū te tai ka puare tēnei toka ka taea te haere mai i reira ki uta",
         strict=True,
     )
+
+
+def test_is_maori_batch():
+    texts = ["kia ora", "hello", "kia ora", "-maori", "", "KeiTePai", "ma'unga"]
+    assert is_maori_batch(texts) == [is_maori(text) for text in texts]
+    assert is_maori_batch(texts, strict=False) == [
+        is_maori(text, strict=False) for text in texts
+    ]
+
+
+def test_is_maori_batch_transcript():
+    with open("data/he-whakaputanga.txt", "r") as f:
+        lines = f.read().splitlines()
+    assert is_maori_batch(lines, n_jobs=2, chunksize=4) == [
+        is_maori(line) for line in lines
+    ]
+
+
+def test_maori_ratio():
+    from reo_toolkit import maori_ratio
+
+    assert maori_ratio("kia ora hello world") == 0.5
+    assert maori_ratio("kia ora hello world", weighted=True) == 6 / 16
+    assert maori_ratio("") == 0.0
+    assert maori_ratio("hello") == 0.0
+
+
+def test_maori_ratio_threshold():
+    from reo_toolkit import maori_ratio
+
+    text = "kia ora koutou katoa hello world hello world"
+    for threshold in [0.1, 0.5, 0.51, 0.9]:
+        for weighted in [False, True]:
+            ratio = maori_ratio(text, weighted=weighted)
+            bound = maori_ratio(text, weighted=weighted, threshold=threshold)
+            assert (bound >= threshold) == (ratio >= threshold)
+
+
+def test_explain_maori():
+    from reo_toolkit import explain_maori
+    from reo_toolkit.phonotactics import Rule
+
+    assert explain_maori("kia ora") is None
+    assert explain_maori("kia ora hello") == (Rule.NON_MAORI_LETTER, 10, 11, 2)
+    assert explain_maori(" kia ora teee") == (Rule.TRIPLE_VOWEL, 10, 13, 2)
+    assert explain_maori("KiaOraHello") == (Rule.NON_MAORI_LETTER, 8, 9, 0)
+    assert explain_maori("kia ora-") == (Rule.EMPTY_SPLIT, 8, 8, 2)
+    assert explain_maori("aha", strict=False) == (Rule.AMBIGUOUS_WORD, 0, 3, 0)
+    texts = ["kia ora", "hello", "-maori", "", "KeiTePai", "ma'unga", "i18n"]
+    for text in texts:
+        for strict in [True, False]:
+            assert (explain_maori(text, strict) is None) == is_maori(text, strict)
+
+
+def test_verbose_leaves_logging_alone(capsys):
+    import logging
+
+    debug = logging.debug
+    assert not is_maori("kia ora hello", verbose=True)
+    assert logging.debug is debug
+    assert capsys.readouterr().out == "Letter 'l' not in maori character set\n"
+
+
+def test_verbose_camel_case(capsys):
+    # Each part of a camelCase token is checked, and described, in lower case
+    assert not is_maori("KiaOraHaK", verbose=True)
+    assert capsys.readouterr().out == "Single character word k is a consonant\n"
+    assert not is_maori("TeReoMāoriX1", verbose=True)
+    assert capsys.readouterr().out == "Letter 'x' not in maori character set\n"
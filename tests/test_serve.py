@@ -0,0 +1,155 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from reo_toolkit.encoders import get_encoder
+from reo_toolkit.numbers import convert_numbers
+from reo_toolkit.reo_toolkit import is_maori
+from reo_toolkit.serve import Server, Client, handle_batch, percentile
+
+
+def run_server(**kwargs):
+    # Run the server's event loop in a thread of its own, on any free port
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = Server(port=0, max_latency=0.01, **kwargs)
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+    yield server
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def server():
+    yield from run_server()
+
+
+@pytest.fixture
+def small_server():
+    yield from run_server(limit=1024)
+
+
+def test_handle_batch():
+    requests = [
+        {"id": 1, "op": "is_maori", "text": "kia ora"},
+        {"id": 2, "op": "is_maori", "text": "hello"},
+        {"id": 3, "op": "is_maori", "text": "ka", "strict": False},
+        {"id": 4, "op": "encode", "text": "whānau", "encoder": "long_syllable"},
+        {"id": 5, "op": "encode", "text": "ngā\nwhare"},
+        {"id": 6, "op": "convert_numbers", "text": "e 3 ngā tamariki"},
+        {"id": 7, "op": "shout", "text": "kia ora"},
+        {"id": 8, "op": "encode", "text": "kia ora", "encoder": "nope"},
+        {"op": "decode", "text": "ŋā"},
+    ]
+    responses = handle_batch(requests)
+    assert [response.get("id") for response in responses] == list(range(1, 9)) + [None]
+    assert [response.get("result") for response in responses[:6]] == [
+        True,
+        False,
+        is_maori("ka", strict=False),
+        get_encoder("long_syllable").encode("whānau"),
+        "ŋā\nƒare",
+        convert_numbers("e 3 ngā tamariki"),
+    ]
+    assert "Invalid op" in responses[6]["error"]
+    assert "Invalid encoder" in responses[7]["error"]
+    assert responses[8] == {"result": "ngā"}
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile(list(range(100)), 50) == 50
+    assert percentile(list(range(100)), 99) == 99
+    assert percentile([1], 99) == 1
+
+
+def test_client(server):
+    with Client(port=server.port, timeout=10) as client:
+        assert client.is_maori("kia ora")
+        assert not client.is_maori("hello world")
+        assert client.encode("whānau") == "ƒānau"
+        assert client.decode("ƒānau") == "whānau"
+        assert client.convert_numbers("e 3 ngā tamariki") == convert_numbers(
+            "e 3 ngā tamariki"
+        )
+        with pytest.raises(ValueError):
+            client.encode("kia ora", encoder="nope")
+        # The connection keeps working after an error
+        assert client.is_maori("tēnā koe")
+
+
+def test_pipelined_requests_are_batched(server):
+    texts = ["kia ora", "hello", "whiti mai te rangi", "tēnā koe"] * 50
+    with Client(port=server.port, timeout=10) as client:
+        before = client.metrics()
+        responses = client.send(
+            [{"id": i, "op": "is_maori", "text": text} for i, text in enumerate(texts)]
+        )
+        assert [response["id"] for response in responses] == list(range(len(texts)))
+        assert [response["result"] for response in responses] == [
+            is_maori(text) for text in texts
+        ]
+        after = client.metrics()
+    assert after["requests"] - before["requests"] == len(texts)
+    # Every request arrived at once, so there are far fewer batches than requests
+    assert after["batches"] - before["batches"] < len(texts) / 4
+    assert after["p50_ms"] <= after["p99_ms"]
+    assert after["queue_depth"] == 0
+
+
+def test_concurrent_clients(server):
+    texts = ["kia ora", "hello", "whiti mai te rangi", "tēnā koe"] * 10
+
+    def run(encoder):
+        with Client(port=server.port, timeout=10) as client:
+            return [client.encode(text, encoder=encoder) for text in texts]
+
+    names = ["base", "double_vowel", "long_syllable", "syllable"]
+    with ThreadPoolExecutor(len(names)) as executor:
+        results = list(executor.map(run, names))
+    for name, encoded in zip(names, results):
+        assert encoded == [get_encoder(name).encode(text) for text in texts]
+
+
+def test_main(tmp_path):
+    import sys
+    import subprocess
+
+    path = str(tmp_path / "reo.sock")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "reo_toolkit.serve", "--unix", path],
+        stderr=subprocess.PIPE,
+    )
+    try:
+        assert process.stderr.readline().decode().startswith("Listening on")
+        with Client(path=path, timeout=10) as client:
+            assert client.is_maori("kia ora")
+            assert client.metrics()["requests"] == 1
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def test_long_requests(server, small_server):
+    text = "kia ora " * 20000
+    with Client(port=server.port, timeout=10) as client:
+        assert client.encode(text) == text
+
+    with Client(port=small_server.port, timeout=10) as client:
+        with pytest.raises(ValueError, match="longer than the limit of 1024"):
+            client.encode(text)
+        # The rest of the long line is skipped and the connection keeps working
+        assert client.encode("whānau") == "ƒānau"
+        responses = client.send(
+            [
+                {"id": 1, "op": "is_maori", "text": "x" * 5000},
+                {"id": 2, "op": "is_maori", "text": "kia ora"},
+            ]
+        )
+        assert "error" in responses[0]
+        assert responses[1] == {"id": 2, "result": True}
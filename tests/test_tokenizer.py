@@ -0,0 +1,74 @@
+from reo_toolkit.encoders import Base, Syllable
+from reo_toolkit.tokenizer import (
+    Token,
+    tokenize,
+    tokenize_with_offsets,
+    detokenize,
+    map_words,
+)
+
+sentences = [
+    "ko murray tōku ingoa",
+    "Kei te pēhea koe?",
+    "39 tiriti o pipitea,",
+    "‘kua whānau. aue!’",
+    "Whiti mai te rangi",
+    "NGĀ MŌTEATEA",
+    "Ko te tino rangatiratanga o ō rātou wenua, ō rātou kāinga",
+]
+
+
+def test_tokenize():
+    assert tokenize("‘kua whānau. aue!’") == [
+        "‘",
+        "kua",
+        "whānau",
+        ".",
+        "aue",
+        "!",
+        "’",
+    ]
+
+
+def test_tokenize_compounds():
+    assert tokenize("tino-rangatiratanga ko'u") == ["tino-rangatiratanga", "ko'u"]
+
+
+def test_tokenize_combining_macron():
+    assert tokenize("māori") == ["māori"]
+
+
+def test_tokenize_with_offsets():
+    text = "Kia ora,  e hoa"
+    tokens = tokenize_with_offsets(text)
+    assert tokens[1] == Token("ora", 4, 7)
+    assert all(text[token.start : token.end] == token.text for token in tokens)
+
+
+def test_detokenize():
+    for sentence in sentences:
+        assert detokenize(tokenize(sentence)) == sentence
+
+
+def test_map_words():
+    assert map_words("kia  ora, e hoa!", str.upper) == "KIA  ORA, E HOA!"
+
+
+def test_treebank_compatible():
+    for encoder, treebank in [
+        (Base(), Base(treebank=True)),
+        (Syllable(), Syllable(treebank=True)),
+    ]:
+        for sentence in sentences:
+            encoded = encoder.encode(sentence)
+            assert encoded == treebank.encode(sentence)
+            assert encoder.decode(encoded) == treebank.decode(encoded)
+
+
+def test_keeps_spacing():
+    text = "kei te  pēhea\tkoe ?"
+    assert Base().decode(Base().encode(text)) == text
+
+
+def test_all_caps_digraphs():
+    assert Base().decode(Base().encode("WHAKANGUNGU")) == "WHAKANGUNGU"
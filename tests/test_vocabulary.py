@@ -0,0 +1,64 @@
+from reo_toolkit import is_maori
+from reo_toolkit.encoders import encoder_classes, get_encoder
+from reo_toolkit.vocabulary import Vocabulary
+
+texts = [
+    "kia ora koutou",
+    "hello world",
+    "Whiti mai te rangi",
+    "ko te rata te next one",
+    "tino-rangatiratanga",
+    "",
+]
+encoders = ["base", "long_syllable"]
+
+
+def test_build():
+    vocabulary = Vocabulary.build(texts, encoders=encoders)
+    assert len(vocabulary) == 15
+    token_id = vocabulary.lookup("rangi")
+    assert vocabulary[token_id] == "rangi"
+    assert vocabulary.verdict(token_id)
+    assert not vocabulary.verdict(vocabulary.lookup("hello"))
+    assert vocabulary.lookup("whānau") is None
+    assert "whānau" not in vocabulary
+    assert vocabulary.ids("kia whānau") == [vocabulary.lookup("kia"), None]
+
+
+def test_matches_is_maori():
+    vocabulary = Vocabulary.build(texts)
+    for text in texts + ["te rata", "kia-", "whānau hello", " te  rangi "]:
+        for strict in [True, False]:
+            assert vocabulary.is_maori(text, strict=strict) == is_maori(text, strict)
+
+
+def test_encode():
+    vocabulary = Vocabulary.build(texts, encoders=encoders)
+    for name in encoders:
+        for text in texts + ["Whiti mai te whānau"]:
+            assert vocabulary.encode(text, name) == get_encoder(name).encode(text)
+
+    # Encoders the vocabulary wasn't built with encode every token as usual
+    text = "kia ora whānau"
+    assert vocabulary.encode(text, "syllable") == get_encoder("syllable").encode(text)
+
+
+def test_encode_hyphenated():
+    # Syllable checks hyphenated words as a whole, so "kia" in "kia-hello" is
+    # left as it is even though "kia" on its own is encoded
+    mixed = ["kia-hello ora", "tino-rangatiratanga", "ko te whare-hello-kia, ā-tōna wā"]
+    names = list(encoder_classes)
+    vocabulary = Vocabulary.build(texts + mixed, encoders=names)
+    for name in names:
+        for text in mixed + ["kia ora kia-hello", "hello-whānau - ngā"]:
+            assert vocabulary.encode(text, name) == get_encoder(name).encode(text)
+
+
+def test_save_and_load(tmp_path):
+    filepath = str(tmp_path / "corpus.vocab")
+    Vocabulary.build(texts, encoders=encoders).save(filepath)
+    vocabulary = Vocabulary.load(filepath)
+    token_id = vocabulary.lookup("Whiti")
+    assert vocabulary.encoding(token_id, "base") == "Ƒiti"
+    assert vocabulary.is_maori("kia ora koutou")
+    vocabulary.close()
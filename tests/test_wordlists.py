@@ -0,0 +1,173 @@
+import io
+import os
+import time
+
+from reo_toolkit.wordlists import (
+    load_wordlist,
+    non_maori,
+    stop_words,
+    scan,
+    scan_stream,
+    wordlist_density,
+)
+
+
+def test_non_maori():
+    assert "toŋue" in non_maori
+    assert "tongue" not in non_maori
+
+
+def test_stop_words():
+    assert len(stop_words) > 0
+
+
+def test_load_wordlist_cache(tmp_path):
+    filepath = str(tmp_path / "terms.txt")
+    with open(filepath, "w") as f:
+        f.write("tongue\nhello\n")
+
+    wordlist = load_wordlist(filepath)
+    assert "toŋue" in wordlist
+    (cachefile,) = [name for name in os.listdir(tmp_path) if name.endswith(".pickle")]
+
+    # Loading from the cache should be well within the import time budget
+    start = time.perf_counter()
+    assert "hello" in load_wordlist(filepath)
+    assert time.perf_counter() - start < 0.05
+
+    # Changing the source rebuilds the wordlist and replaces the stale cache
+    with open(filepath, "w") as f:
+        f.write("goodbye\n")
+    wordlist = load_wordlist(filepath)
+    assert "goodbye" in wordlist
+    assert "hello" not in wordlist
+    cachefiles = [name for name in os.listdir(tmp_path) if name.endswith(".pickle")]
+    assert len(cachefiles) == 1
+    assert cachefiles != [cachefile]
+
+
+def test_load_wordlist_rebuilds_bad_cache(tmp_path):
+    filepath = str(tmp_path / "terms.txt")
+    with open(filepath, "w") as f:
+        f.write("hello\n")
+    load_wordlist(filepath)
+    (cachefile,) = [name for name in os.listdir(tmp_path) if name.endswith(".pickle")]
+
+    # A pickle that refers to a module that isn't there
+    with open(str(tmp_path / cachefile), "wb") as f:
+        f.write(b"cno_such_module\nAutomaton\n.")
+    assert "hello" in load_wordlist(filepath)
+
+
+def test_load_wordlist_cache_per_build(tmp_path, monkeypatch):
+    from reo_toolkit import wordlists
+
+    def pickles():
+        return sorted(name for name in os.listdir(tmp_path) if name.endswith(".pickle"))
+
+    filepath = str(tmp_path / "terms.txt")
+    with open(filepath, "w") as f:
+        f.write("hello\n")
+    load_wordlist(filepath)
+    (cachefile,) = pickles()
+
+    # Another build of pyahocorasick or Python gets a cache file of its own and
+    # leaves the first one alone
+    version = wordlists.automaton_version
+    monkeypatch.setattr(wordlists, "automaton_version", lambda: b"other\n")
+    assert "hello" in load_wordlist(filepath)
+    assert len(pickles()) == 2 and cachefile in pickles()
+
+    built = []
+    monkeypatch.setattr(wordlists, "make_wordlist", built.append)
+    monkeypatch.setattr(wordlists, "automaton_version", version)
+    assert "hello" in load_wordlist(filepath)
+    assert built == []
+
+    # Changing the source removes the pickles of every build
+    monkeypatch.undo()
+    with open(filepath, "w") as f:
+        f.write("goodbye\n")
+    assert "goodbye" in load_wordlist(filepath)
+    assert len(pickles()) == 1 and pickles() != [cachefile]
+
+
+def test_scan():
+    text = "Ko NGĀ tāngata, tongue a-e"
+    matches = list(scan(text))
+    assert [text[m.start : m.end] for m in matches] == ["NGĀ", "tongue", "a", "e"]
+    assert [m.wordlist for m in matches] == [
+        "stop_words",
+        "non_maori",
+        "ambiguous",
+        "stop_words",
+    ]
+
+
+def test_scan_whole_words_only():
+    assert list(scan("tongues kaite")) == []
+
+
+def test_scan_stream():
+    text = "ko te reo\nhello tongue " * 3
+    matches = list(scan_stream(io.StringIO(text), blocksize=8))
+    assert [text[m.start : m.end] for m in matches] == ["te", "tongue"] * 3
+
+
+def test_wordlist_density():
+    density = wordlist_density(["ko te reo\n", "hello tongue\n"])
+    assert density == {
+        "tokens": 5,
+        "ambiguous": 0.0,
+        "non_maori": 0.2,
+        "stop_words": 0.2,
+    }
+    # Hyphens and punctuation separate words as well as whitespace
+    density = wordlist_density(["a-e-a-e-a\n", "kia ora, hello!\n"])
+    assert density["tokens"] == 8
+    assert all(0.0 <= density[name] <= 1.0 for name in density if name != "tokens")
+
+
+def test_freeze(tmp_path):
+    from reo_toolkit import wordlists
+    from reo_toolkit.wordlists import FrozenWordlist, freeze, attach
+
+    filepath = freeze(str(tmp_path / "wordlists.frozen"))
+    automata = {name: getattr(wordlists, name) for name in wordlists.wordlist_files}
+    try:
+        attach(filepath)
+        for name, automaton in automata.items():
+            frozen = getattr(wordlists, name)
+            assert isinstance(frozen, FrozenWordlist)
+            assert len(frozen) == len(automaton)
+            assert sorted(frozen) == sorted(automaton.keys())
+            for term in automaton.keys():
+                assert term in frozen
+            for term in ["tongue", "kia", "", "ŋ"]:
+                assert (term in frozen) == (term in automaton)
+        assert "toŋue" in wordlists.non_maori
+    finally:
+        vars(wordlists).update(automata)
+
+
+def attached_verdicts(texts):
+    from reo_toolkit import wordlists
+    from reo_toolkit.reo_toolkit import is_maori
+
+    return [type(wordlists.non_maori).__name__] + [
+        is_maori(text, strict=False) for text in texts
+    ]
+
+
+def test_attach_in_spawned_workers(tmp_path):
+    import multiprocessing
+    from reo_toolkit.reo_toolkit import is_maori
+    from reo_toolkit.wordlists import freeze, attach
+
+    texts = ["kia ora", "tongue", "a", "hello", "ka pai"]
+    filepath = freeze(str(tmp_path / "wordlists.frozen"))
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(2, initializer=attach, initargs=(filepath,)) as pool:
+        results = pool.map(attached_verdicts, [texts] * 2)
+    expected = [is_maori(text, strict=False) for text in texts]
+    assert results == [["FrozenWordlist"] + expected] * 2